@@ -1,4 +1,11 @@
+import os
+
+# Thread budget for the BLAS/OpenMP pools; must be set before numpy/torch import
+os.environ.setdefault('OMP_NUM_THREADS', str(os.cpu_count() or 1))
+os.environ.setdefault('MKL_NUM_THREADS', str(os.cpu_count() or 1))
+
 from typing import List, Dict, Any, Optional
+from collections import deque, OrderedDict
 import json
 from pathlib import Path
 import numpy as np
@@ -6,12 +13,95 @@ from sentence_transformers import SentenceTransformer
 import re
 import pickle
 import logging
-import os
+import heapq
+
+# Optional Arrow serialization for texts and metadata (much faster than pickle)
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Optional Numba JIT for the fused cosine-similarity kernel
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Optional streaming JSON parser for large catalogs
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Optional BLAS sgemv for block-tiled similarity on large stores
+try:
+    from scipy.linalg.blas import sgemv
+    SCIPY_BLAS_AVAILABLE = True
+except ImportError:
+    SCIPY_BLAS_AVAILABLE = False
+
+# Optional ONNX Runtime backend for the embedding model (2-4x faster on CPU)
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Precompiled splitters used by SimpleTextSplitter on every document
+_PARA_SPLIT_RE = re.compile(r'\n\s*\n')
+_SENT_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Columns of the structure-of-arrays metadata store
+META_FIELDS = ('source', 'title', 'date', 'chunk_index')
+# Documents accumulated per batch when streaming a JSON catalog
+JSON_STREAM_BATCH = 256
+# Maximum number of query embeddings kept in the per-instance LRU cache
+QUERY_CACHE_SIZE = 1024
+# Row count above which search switches to the block-tiled BLAS path
+GEMV_MIN_ROWS = 4096
+# Row-block budget (bytes) sized to stay resident in L2 cache
+GEMV_BLOCK_BYTES = 65536
+
+
+def _empty_meta() -> Dict[str, list]:
+    """Return a fresh columnar metadata store."""
+    return {field: [] for field in META_FIELDS}
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _cosine_similarities(embeddings, query):
+        """Fused cosine similarity: one pass computes both dot and row norm.
+
+        Reads each embedding row exactly once, halving memory traffic
+        compared to separate np.dot and np.linalg.norm passes.
+        """
+        n_rows = embeddings.shape[0]
+        out = np.empty(n_rows, np.float32)
+        q_sq = 0.0
+        for j in range(query.shape[0]):
+            q_sq += query[j] * query[j]
+        q_norm = np.sqrt(q_sq)
+        for i in prange(n_rows):
+            dot = 0.0
+            row_sq = 0.0
+            for j in range(embeddings.shape[1]):
+                e = embeddings[i, j]
+                dot += e * query[j]
+                row_sq += e * e
+            out[i] = dot / (np.sqrt(row_sq) * q_norm + 1e-12)
+        return out
+
 class SimpleTextSplitter:
     def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
         self.chunk_size = chunk_size
@@ -24,7 +114,7 @@ class SimpleTextSplitter:
             return []
             
         # First split by paragraphs
-        paragraphs = re.split(r'\n\s*\n', text)
+        paragraphs = _PARA_SPLIT_RE.split(text)
         chunks = []
         current_chunk = []
         current_length = 0
@@ -32,7 +122,7 @@ class SimpleTextSplitter:
         for paragraph in paragraphs:
             # If paragraph is too long, split it into sentences
             if len(paragraph) > self.chunk_size:
-                sentences = re.split(r'(?<=[.!?])\s+', paragraph)
+                sentences = _SENT_SPLIT_RE.split(paragraph)
                 for sentence in sentences:
                     if current_length + len(sentence) > self.chunk_size:
                         if current_chunk:
@@ -72,19 +162,48 @@ class RAGProcessor:
             self.persist_directory.mkdir(parents=True, exist_ok=True)
             logger.info(f"Created/verified directory: {self.persist_directory}")
             
-            # Initialize the embedding model
+            # Initialize the embedding model (ONNX Runtime when available,
+            # PyTorch SentenceTransformer otherwise)
             logger.info("Initializing embedding model...")
-            self.embedding_model = SentenceTransformer(
-                'distiluse-base-multilingual-cased-v2',
-                device='cpu'
-            )
+            self.embedding_model = None
+            self.onnx_model = None
+            self.onnx_tokenizer = None
+            if ONNX_AVAILABLE:
+                try:
+                    self._make_onnx_session()
+                except Exception as e:
+                    logger.warning(f"ONNX Runtime backend unavailable, falling back to PyTorch: {str(e)}")
+                    self.onnx_model = None
+                    self.onnx_tokenizer = None
+            if self.onnx_model is None:
+                # Give PyTorch the full core budget for intra-op work;
+                # a single inter-op thread avoids oversubscription
+                import torch
+                torch.set_num_threads(os.cpu_count() or 1)
+                try:
+                    torch.set_num_interop_threads(1)
+                except RuntimeError:
+                    # Already configured (e.g. torch work started elsewhere)
+                    pass
+                self.embedding_model = SentenceTransformer(
+                    'distiluse-base-multilingual-cased-v2',
+                    device='cpu'
+                )
             logger.info("Embedding model initialized successfully")
             
-            # Initialize storage
+            # Initialize storage; metadata is kept columnar (one list per
+            # field) rather than as one dict per chunk, which shrinks memory
+            # and serializes far faster
             self.texts = []
-            self.metadatas = []
-            self.embeddings = None
-            
+            self.meta = _empty_meta()
+            # Embeddings live in a capacity-doubling buffer; the public
+            # `embeddings` property exposes a view over the filled rows
+            self._emb_buf = None
+            self._emb_len = 0
+
+            # LRU cache of query embeddings (chatbot traffic repeats queries)
+            self._query_cache = OrderedDict()
+
             # Initialize text splitter
             self.text_splitter = SimpleTextSplitter(
                 chunk_size=1000,
@@ -93,125 +212,278 @@ class RAGProcessor:
             
             # Load existing data if available
             self._load_from_disk()
-            
+
+            if NUMBA_AVAILABLE:
+                # Pre-JIT the cosine kernel so the first query pays no compile cost
+                _cosine_similarities(
+                    np.zeros((1, 2), dtype=np.float32),
+                    np.zeros(2, dtype=np.float32)
+                )
+
         except Exception as e:
             logger.error(f"Error initializing RAG processor: {str(e)}")
             raise
 
+    @property
+    def embeddings(self) -> Optional[np.ndarray]:
+        """View over the filled rows of the embeddings buffer."""
+        if self._emb_buf is None or self._emb_len == 0:
+            return None
+        return self._emb_buf[:self._emb_len]
+
+    @embeddings.setter
+    def embeddings(self, value: Optional[np.ndarray]) -> None:
+        if value is None:
+            self._emb_buf = None
+            self._emb_len = 0
+        else:
+            self._emb_buf = np.asarray(value, dtype=np.float32)
+            self._emb_len = len(self._emb_buf)
+
+    def _append_embeddings(self, block: np.ndarray) -> None:
+        """Append embedding rows with amortized O(1) growth.
+
+        The backing buffer doubles in capacity on overflow, replacing the
+        per-batch np.vstack that copied the whole store on every ingest.
+        """
+        block = np.asarray(block, dtype=np.float32)
+        if block.size == 0:
+            return
+        if self._emb_buf is None or self._emb_buf.size == 0:
+            self._emb_buf = block.copy()
+            self._emb_len = len(block)
+            return
+
+        need = self._emb_len + len(block)
+        if need > len(self._emb_buf):
+            new_cap = max(16, 2 * need)
+            grown = np.empty((new_cap, block.shape[1]), dtype=np.float32)
+            grown[:self._emb_len] = self._emb_buf[:self._emb_len]
+            self._emb_buf = grown
+        self._emb_buf[self._emb_len:need] = block
+        self._emb_len = need
+
+    def _make_onnx_session(self) -> None:
+        """Build an ONNX Runtime session for the embedding model.
+
+        Exports the sentence-transformers model to ONNX (cached in the
+        persist directory) and applies int8 dynamic quantization, which is
+        typically 2-4x faster than PyTorch eager mode on CPU.
+        """
+        model_id = 'sentence-transformers/distiluse-base-multilingual-cased-v2'
+        onnx_dir = self.persist_directory / "onnx"
+        quantized_path = onnx_dir / "model_quantized.onnx"
+
+        if quantized_path.exists():
+            logger.info(f"Loading quantized ONNX model from {onnx_dir}")
+            self.onnx_model = ORTModelForFeatureExtraction.from_pretrained(
+                onnx_dir,
+                file_name=quantized_path.name,
+                provider='CPUExecutionProvider'
+            )
+        else:
+            logger.info("Exporting embedding model to ONNX...")
+            model = ORTModelForFeatureExtraction.from_pretrained(
+                model_id,
+                export=True,
+                provider='CPUExecutionProvider'
+            )
+            model.save_pretrained(onnx_dir)
+            try:
+                # int8 dynamic quantization for an extra CPU speedup
+                quantizer = ORTQuantizer.from_pretrained(onnx_dir)
+                qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+                quantizer.quantize(save_dir=onnx_dir, quantization_config=qconfig)
+                self.onnx_model = ORTModelForFeatureExtraction.from_pretrained(
+                    onnx_dir,
+                    file_name=quantized_path.name,
+                    provider='CPUExecutionProvider'
+                )
+            except Exception as e:
+                logger.warning(f"int8 quantization failed, using fp32 ONNX model: {str(e)}")
+                self.onnx_model = model
+
+        self.onnx_tokenizer = AutoTokenizer.from_pretrained(model_id)
+        logger.info("ONNX Runtime session initialized")
+
+    def _encode(self, texts: List[str], show_progress_bar: bool = False) -> np.ndarray:
+        """Encode texts into embeddings using the active backend."""
+        if self.onnx_model is not None:
+            return self._encode_onnx(texts)
+        return np.asarray(self.embedding_model.encode(texts, show_progress_bar=show_progress_bar))
+
+    def _encode_onnx(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Encode texts with the ONNX session: tokenize, mean-pool, L2-normalize."""
+        embeddings = []
+        for start in range(0, len(texts), batch_size):
+            batch = self.onnx_tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=512,
+                return_tensors='np'
+            )
+            hidden = self.onnx_model(**batch).last_hidden_state
+            mask = batch['attention_mask'][..., None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            embeddings.append(pooled.astype(np.float32))
+        return np.vstack(embeddings)
+
     def _load_from_disk(self) -> None:
         """Load existing data from disk if available."""
         try:
+            texts_arrow_path = self.persist_directory / "texts.arrow"
+            meta_arrow_path = self.persist_directory / "meta.arrow"
             texts_path = self.persist_directory / "texts.pkl"
             embeddings_path = self.persist_directory / "embeddings.npy"
             metadata_path = self.persist_directory / "metadata.pkl"
-            
-            if all(p.exists() for p in [texts_path, embeddings_path, metadata_path]):
-                logger.info("Loading existing data from disk...")
+
+            if (PYARROW_AVAILABLE and embeddings_path.exists()
+                    and texts_arrow_path.exists() and meta_arrow_path.exists()):
+                logger.info("Loading existing data from disk (Arrow)...")
+                texts_table = feather.read_table(texts_arrow_path, memory_map=True)
+                self.texts = texts_table.column('text').to_pylist()
+                meta_table = feather.read_table(meta_arrow_path, memory_map=True)
+                self.meta = {field: meta_table.column(field).to_pylist() for field in META_FIELDS}
+                self.embeddings = np.load(embeddings_path)
+            elif all(p.exists() for p in [texts_path, embeddings_path, metadata_path]):
+                logger.info("Loading existing data from disk (pickle)...")
                 with open(texts_path, 'rb') as f:
                     self.texts = pickle.load(f)
                 with open(metadata_path, 'rb') as f:
-                    self.metadatas = pickle.load(f)
-                self.embeddings = np.load(embeddings_path)
-                
-                # Validate data consistency
-                if len(self.texts) != len(self.metadatas) or len(self.texts) != self.embeddings.shape[0]:
-                    logger.warning(f"Data inconsistency detected: texts={len(self.texts)}, metadatas={len(self.metadatas)}, embeddings={self.embeddings.shape[0]}")
-                    logger.warning("Clearing corrupted data and starting fresh...")
-                    self.texts = []
-                    self.metadatas = []
-                    self.embeddings = None
-                    self._save_to_disk()
+                    loaded_meta = pickle.load(f)
+                if isinstance(loaded_meta, list):
+                    # Legacy row-wise format (one dict per chunk): convert
+                    self.meta = _empty_meta()
+                    for row in loaded_meta:
+                        for field in META_FIELDS:
+                            self.meta[field].append(row.get(field, 'unknown'))
                 else:
-                    logger.info(f"Loaded {len(self.texts)} documents from disk")
+                    self.meta = loaded_meta
+                self.embeddings = np.load(embeddings_path)
             else:
                 logger.info("No existing data found on disk")
+                return
+
+            # Validate data consistency
+            meta_len = len(self.meta['source'])
+            if len(self.texts) != meta_len or len(self.texts) != self.embeddings.shape[0]:
+                logger.warning(f"Data inconsistency detected: texts={len(self.texts)}, metadatas={meta_len}, embeddings={self.embeddings.shape[0]}")
+                logger.warning("Clearing corrupted data and starting fresh...")
+                self.texts = []
+                self.meta = _empty_meta()
+                self.embeddings = None
+                self._save_to_disk()
+            else:
+                logger.info(f"Loaded {len(self.texts)} documents from disk")
         except Exception as e:
             logger.error(f"Error loading data from disk: {str(e)}")
             # Clear corrupted data
             self.texts = []
-            self.metadatas = []
+            self.meta = _empty_meta()
             self.embeddings = None
             self._save_to_disk()
 
     def _save_to_disk(self) -> None:
         """Save current data to disk."""
         try:
-            texts_path = self.persist_directory / "texts.pkl"
             embeddings_path = self.persist_directory / "embeddings.npy"
-            metadata_path = self.persist_directory / "metadata.pkl"
-            
+
             logger.info(f"Saving {len(self.texts)} documents to disk...")
-            
-            # Save texts
-            with open(texts_path, 'wb') as f:
-                pickle.dump(self.texts, f)
-            logger.info(f"Saved texts to {texts_path}")
-            
-            # Save metadata
-            with open(metadata_path, 'wb') as f:
-                pickle.dump(self.metadatas, f)
-            logger.info(f"Saved metadata to {metadata_path}")
-            
+
+            if PYARROW_AVAILABLE:
+                # Arrow IPC: columnar, lz4-compressed, memory-mappable on load
+                texts_arrow_path = self.persist_directory / "texts.arrow"
+                meta_arrow_path = self.persist_directory / "meta.arrow"
+                feather.write_feather(
+                    pa.table({'text': self.texts}), texts_arrow_path, compression='lz4'
+                )
+                logger.info(f"Saved texts to {texts_arrow_path}")
+                feather.write_feather(
+                    pa.table(self.meta), meta_arrow_path, compression='lz4'
+                )
+                logger.info(f"Saved metadata to {meta_arrow_path}")
+            else:
+                texts_path = self.persist_directory / "texts.pkl"
+                metadata_path = self.persist_directory / "metadata.pkl"
+
+                # Save texts
+                with open(texts_path, 'wb') as f:
+                    pickle.dump(self.texts, f)
+                logger.info(f"Saved texts to {texts_path}")
+
+                # Save metadata (columnar dict of lists)
+                with open(metadata_path, 'wb') as f:
+                    pickle.dump(self.meta, f)
+                logger.info(f"Saved metadata to {metadata_path}")
+
             # Save embeddings
             if self.embeddings is not None:
                 np.save(embeddings_path, self.embeddings)
                 logger.info(f"Saved embeddings to {embeddings_path}")
-            
+
             logger.info("All data saved successfully")
-            
+
         except Exception as e:
             logger.error(f"Error saving data to disk: {str(e)}")
             raise
 
-    def process_documents(self, documents: List[Dict[str, Any]]) -> None:
-        """Process and store documents in the vector store."""
+    def process_documents(self, documents: List[Dict[str, Any]], save: bool = True) -> None:
+        """Process and store documents in the vector store.
+
+        With save=False the on-disk store is left untouched so callers
+        feeding documents in batches can persist once at the end instead
+        of rewriting the whole store per batch.
+        """
         try:
             logger.info(f"Processing {len(documents)} documents...")
             new_texts = []
-            new_metadatas = []
-            
+            new_meta = _empty_meta()
+
             for doc in documents:
                 # Split document into chunks
                 chunks = self.text_splitter.split_text(doc['content'])
                 logger.info(f"Split document into {len(chunks)} chunks")
-                
-                # Add chunks and their metadata
+
+                # Add chunks and their metadata columns
                 new_texts.extend(chunks)
-                new_metadatas.extend([{
-                    'source': doc.get('source', 'unknown'),
-                    'title': doc.get('title', 'unknown'),
-                    'date': doc.get('date', 'unknown'),
-                    'chunk_index': i
-                } for i in range(len(chunks))])
-            
-            # Generate embeddings for new texts
+                n_chunks = len(chunks)
+                new_meta['source'].extend([doc.get('source', 'unknown')] * n_chunks)
+                new_meta['title'].extend([doc.get('title', 'unknown')] * n_chunks)
+                new_meta['date'].extend([doc.get('date', 'unknown')] * n_chunks)
+                new_meta['chunk_index'].extend(range(n_chunks))
+            
+            # Generate embeddings for new texts, encoding each unique chunk
+            # only once and fanning the result back to the original positions
+            # (boilerplate blocks repeat across catalog documents)
             logger.info("Generating embeddings for new texts...")
-            new_embeddings = self.embedding_model.encode(new_texts, show_progress_bar=True)
+            unique_texts, inverse = np.unique(np.array(new_texts, dtype=object), return_inverse=True)
+            if len(unique_texts) < len(new_texts):
+                logger.info(f"Encoding {len(unique_texts)} unique chunks out of {len(new_texts)}")
+            unique_embeddings = self._encode(list(unique_texts), show_progress_bar=True)
+            new_embeddings = np.asarray(unique_embeddings)[inverse]
             
             # Update storage
             self.texts.extend(new_texts)
-            self.metadatas.extend(new_metadatas)
+            for field in META_FIELDS:
+                self.meta[field].extend(new_meta[field])
             
-            # Handle embeddings properly
-            if self.embeddings is None:
-                self.embeddings = new_embeddings
-            else:
-                # Ensure both arrays have the same number of dimensions
-                if self.embeddings.size == 0:
-                    self.embeddings = new_embeddings
-                else:
-                    self.embeddings = np.vstack([self.embeddings, new_embeddings])
+            # Append to the embeddings buffer (amortized O(1))
+            self._append_embeddings(new_embeddings)
             
             # Validate consistency
-            if len(self.texts) != len(self.metadatas) or len(self.texts) != self.embeddings.shape[0]:
-                logger.error(f"Data inconsistency after processing: texts={len(self.texts)}, metadatas={len(self.metadatas)}, embeddings={self.embeddings.shape[0]}")
+            meta_len = len(self.meta['source'])
+            if len(self.texts) != meta_len or len(self.texts) != self.embeddings.shape[0]:
+                logger.error(f"Data inconsistency after processing: texts={len(self.texts)}, metadatas={meta_len}, embeddings={self.embeddings.shape[0]}")
                 raise ValueError("Data arrays are not in sync after processing documents")
             
             logger.info(f"Added {len(new_texts)} new chunks to storage")
             
-            # Save to disk
-            self._save_to_disk()
-            
+            # Save to disk (unless the caller batches and saves at the end)
+            if save:
+                self._save_to_disk()
+
         except Exception as e:
             logger.error(f"Error processing documents: {str(e)}")
             raise
@@ -230,31 +502,41 @@ class RAGProcessor:
             logger.info(f"Searching for query: '{query}' with k={k}")
             logger.info(f"Available texts: {len(self.texts)}, embeddings shape: {self.embeddings.shape}")
             
-            # Generate query embedding
-            query_embedding = self.embedding_model.encode([query])[0]
+            # Generate query embedding (cached for repeated queries)
+            query_embedding = self._embed_query(query)
             logger.info(f"Query embedding shape: {query_embedding.shape}")
             
-            # Calculate cosine similarity
-            similarities = np.dot(self.embeddings, query_embedding) / (
-                np.linalg.norm(self.embeddings, axis=1) * np.linalg.norm(query_embedding)
-            )
-            logger.info(f"Similarities shape: {similarities.shape}")
-            
-            # Get top k results
-            top_k_indices = np.argsort(similarities)[-k:][::-1]
+            # Calculate cosine similarity and take the top k results; large
+            # stores go through the block-tiled BLAS path to avoid streaming
+            # the whole matrix through memory at once
+            if SCIPY_BLAS_AVAILABLE and self.embeddings.shape[0] > GEMV_MIN_ROWS:
+                top_k_indices, top_k_scores = self._top_k_blocked(query_embedding, k)
+            else:
+                if NUMBA_AVAILABLE:
+                    similarities = _cosine_similarities(
+                        np.ascontiguousarray(self.embeddings, dtype=np.float32),
+                        np.ascontiguousarray(query_embedding, dtype=np.float32)
+                    )
+                else:
+                    similarities = np.dot(self.embeddings, query_embedding) / (
+                        np.linalg.norm(self.embeddings, axis=1) * np.linalg.norm(query_embedding)
+                    )
+                logger.info(f"Similarities shape: {similarities.shape}")
+                top_k_indices = np.argsort(similarities)[-k:][::-1]
+                top_k_scores = similarities[top_k_indices]
             logger.info(f"Top k indices: {top_k_indices}")
-            
-            # Format results
+
+            # Format results; metadata dicts are materialised only for the k hits
             results = []
-            for idx in top_k_indices:
-                if idx < len(self.texts) and idx < len(self.metadatas):
+            for idx, score in zip(top_k_indices, top_k_scores):
+                if idx < len(self.texts) and idx < len(self.meta['source']):
                     results.append({
                         'content': self.texts[idx],
-                        'metadata': self.metadatas[idx],
-                        'score': float(similarities[idx])
+                        'metadata': {field: self.meta[field][idx] for field in META_FIELDS},
+                        'score': float(score)
                     })
                 else:
-                    logger.warning(f"Index {idx} out of range for texts ({len(self.texts)}) or metadatas ({len(self.metadatas)})")
+                    logger.warning(f"Index {idx} out of range for texts ({len(self.texts)}) or metadatas ({len(self.meta['source'])})")
             
             logger.info(f"Returning {len(results)} results")
             return results
@@ -263,55 +545,136 @@ class RAGProcessor:
             logger.error(f"Error in search method: {str(e)}")
             return []
 
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Return the embedding for a query string, memoised in a small LRU.
+
+        Identical queries are common in conversational traffic; cache hits
+        skip the encoder entirely. A manual OrderedDict LRU is used because
+        functools.lru_cache cannot key on the (unhashable) processor itself.
+        """
+        cached = self._query_cache.get(query)
+        if cached is not None:
+            self._query_cache.move_to_end(query)
+            return cached
+
+        embedding = self._encode([query])[0].astype(np.float32)
+        self._query_cache[query] = embedding
+        if len(self._query_cache) > QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+        return embedding
+
+    def _top_k_blocked(self, query_embedding: np.ndarray, k: int) -> tuple:
+        """Block-tiled top-k cosine similarity using BLAS sgemv.
+
+        Streams the embedding matrix in L2-sized row blocks, keeping the
+        query vector hot in cache and maintaining a running top-k min-heap
+        instead of materialising the full similarity vector.
+        """
+        embeddings = np.ascontiguousarray(self.embeddings, dtype=np.float32)
+        query = np.ascontiguousarray(query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        n_rows, dim = embeddings.shape
+        block_rows = max(1, GEMV_BLOCK_BYTES // (dim * 4))
+
+        heap = []
+        for start in range(0, n_rows, block_rows):
+            block = embeddings[start:start + block_rows]
+            sims = sgemv(1.0, block, query) / (
+                np.linalg.norm(block, axis=1) * query_norm + 1e-12
+            )
+            for i, sim in enumerate(sims):
+                if len(heap) < k:
+                    heapq.heappush(heap, (sim, start + i))
+                elif sim > heap[0][0]:
+                    heapq.heappushpop(heap, (sim, start + i))
+
+        heap.sort(reverse=True)
+        indices = np.array([idx for _, idx in heap], dtype=np.int64)
+        scores = np.array([sim for sim, _ in heap], dtype=np.float32)
+        return indices, scores
+
     def _extract_content_from_category(self, category: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Extract content from a category and its subcategories."""
+        """Extract content from a category and its subcategories.
+
+        Walks the category tree iteratively with an explicit stack, so deep
+        trees pay no Python call-frame overhead and cannot hit RecursionError.
+        """
         documents = []
-        
-        # Process contents in this category
-        if 'contents' in category:
-            for content in category['contents']:
+        stack = deque([category])
+
+        while stack:
+            current = stack.pop()
+
+            # Process contents in this category
+            for content in current.get('contents', ()):
                 # Create a document from the content
-                doc = {
+                documents.append({
                     'content': content.get('description', '') + '\n' + content.get('title', ''),
                     'source': content.get('url', 'unknown'),
                     'title': content.get('title', 'unknown'),
                     'date': content.get('last_updated', 'unknown'),
-                    'category': category.get('name', 'unknown'),
+                    'category': current.get('name', 'unknown'),
                     'keywords': content.get('keywords', [])
-                }
-                documents.append(doc)
-        
-        # Process subcategories recursively
-        if 'subcategories' in category:
-            for subcategory in category['subcategories']:
-                documents.extend(self._extract_content_from_category(subcategory))
-        
+                })
+
+            # Queue subcategories for the same pass
+            stack.extend(current.get('subcategories', ()))
+
         return documents
 
     def load_from_json(self, json_file: str) -> None:
         """Load documents from a JSON file and process them."""
         try:
             logger.info(f"Loading JSON file: {json_file}")
+            if IJSON_AVAILABLE:
+                self._load_from_json_stream(json_file)
+                return
+
             with open(json_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-            
+
             # Extract all documents from categories
             all_documents = []
             if 'categories' in data:
                 for category in data['categories']:
                     all_documents.extend(self._extract_content_from_category(category))
-            
+
             logger.info(f"Extracted {len(all_documents)} documents from JSON")
             self.process_documents(all_documents)
-            
+
         except Exception as e:
             logger.error(f"Error loading JSON file: {str(e)}")
             raise
 
+    def _load_from_json_stream(self, json_file: str) -> None:
+        """Stream categories from a JSON file with ijson.
+
+        Parses one category at a time instead of materialising the whole
+        document tree, keeping memory flat and letting embedding start
+        before the file is fully read.
+        """
+        batch = []
+        total = 0
+        # Defer persistence to a single save after the stream: saving per
+        # batch would rewrite the entire store O(n/batch) times
+        with open(json_file, 'rb') as f:
+            for category in ijson.items(f, 'categories.item'):
+                batch.extend(self._extract_content_from_category(category))
+                if len(batch) >= JSON_STREAM_BATCH:
+                    total += len(batch)
+                    self.process_documents(batch, save=False)
+                    batch = []
+        if batch:
+            total += len(batch)
+            self.process_documents(batch, save=False)
+        if total:
+            self._save_to_disk()
+        logger.info(f"Extracted {total} documents from JSON stream")
+
     def clear_vector_store(self) -> None:
         """Clear all documents from the vector store."""
         self.texts = []
-        self.metadatas = []
+        self.meta = _empty_meta()
         self.embeddings = None
         self._save_to_disk()
 
@@ -430,21 +793,18 @@ if __name__ == "__main__":
         
         # Generate embeddings for new texts
         logger.info("Generating embeddings for new texts...")
-        embeddings = rag.embedding_model.encode(chunks, show_progress_bar=True, batch_size=32)
+        embeddings = rag._encode(chunks, show_progress_bar=True)
         
         # Add to storage
         for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
             rag.texts.append(chunk)
-            rag.metadatas.append({
-                **doc["metadata"],
-                "chunk_index": i
-            })
+            rag.meta['source'].append(doc["metadata"]["source"])
+            rag.meta['title'].append(doc["metadata"]["title"])
+            rag.meta['date'].append(doc["metadata"]["date"])
+            rag.meta['chunk_index'].append(i)
         
-        # Add all embeddings at once to avoid vstack issues
-        if rag.embeddings is None:
-            rag.embeddings = embeddings
-        else:
-            rag.embeddings = np.vstack([rag.embeddings, embeddings])
+        # Add all embeddings at once through the growth buffer
+        rag._append_embeddings(embeddings)
         
         logger.info(f"Added {len(chunks)} new chunks to storage")
     
@@ -1,11 +1,44 @@
 import os
+import re
 import json
 import time
+import shutil
+import asyncio
 import logging
+import atexit
+import functools
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import hashlib
-from urllib.parse import urlparse, unquote, urljoin
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse, urlunparse, unquote, urljoin, parse_qsl, urlencode
+from bs4 import BeautifulSoup, FeatureNotFound
+import soupsieve as sv
+
+try:
+    import lxml.html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+try:
+    import aiofiles
+    AIOFILES_AVAILABLE = True
+except ImportError:
+    AIOFILES_AVAILABLE = False
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -16,6 +49,8 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from datetime import datetime
 from typing import List, Dict, Optional, Union, Tuple, Set
 from queue import Queue
+from collections import deque, Counter
+from concurrent.futures import ThreadPoolExecutor
 from data_structure import Content, Category, KnowledgeBase
 
 # Configurações de logging
@@ -25,6 +60,125 @@ file_handler = logging.FileHandler("scraper.log")
 file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
 logger.addHandler(file_handler)
 
+# User-Agent usado tanto pelo Chrome como pela sessão HTTP
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+
+# Seletores CSS pré-compilados usados nos loops por página — evita que o
+# SoupSieve recompile a string do seletor em cada chamada
+_CONTENT_BLOCK_SEL = sv.compile(
+    '.content, .block, .item, .card, .news-item, article, .group-item, .info, .event, '
+    '.list-item, .news, .article, .post, .service-item, .feature, .department, '
+    '.project, .program, .initiative')
+_TEXT_BLOCK_SEL = sv.compile(
+    'p, .block_122, .text, .description, li, .content-block, '
+    'div.info, .details, .summary, .paragraph, .body-text, '
+    'div.texto, .content-text, .article-body, div[data-content], '
+    'div.conteudo, span.text, .news-content, .info-text')
+_BLOCK_TITLE_SEL = sv.compile('.name, .title, h3, h4, h5, strong, .event-title, .item-title, .card-title')
+_BLOCK_DESC_SEL = sv.compile(
+    '.description, .excerpt, p, .summary, .details, .event-date, '
+    '.event-hour, .event-local, .text, .info-text, .card-text')
+_SUBCAT_PANEL_SEL = sv.compile('.panel-menu, .sub-panel-menu, .submenu, nav, .nav, .sidebar')
+_SUBCAT_FALLBACK_SEL = sv.compile('ul, .list, .list-group, .accordion, .dropdown-menu')
+
+# Tokenização de palavras-chave: regex pré-compilada e stop-words num
+# frozenset — usados por extract_keywords em cada Content criado
+_TOKEN_RE = re.compile(r'\b[a-zà-ÿ]{4,}\b')
+_STOP_WORDS = frozenset((
+    "do", "da", "de", "no", "na", "os", "as", "um", "uma", "com",
+    "para", "pelo", "pela", "que", "por"
+))
+
+# Classificação de conteúdo por URL: token encontrado -> rótulo, com a
+# alternação compilada uma vez — uma passagem da regex substitui a cadeia
+# de testes de substring em determine_content_type
+_CTYPE_MAP = {
+    'noticia': 'Notícia', 'news': 'Notícia',
+    'evento': 'Evento', 'agenda': 'Evento',
+    'documento': 'Documento', '.pdf': 'Documento',
+    'projeto': 'Projeto',
+    'educacao': 'Educacional', 'escola': 'Educacional', 'ensino': 'Educacional',
+    'cultura': 'Cultural', 'museu': 'Cultural', 'teatro': 'Cultural',
+    'mobilidade': 'Mobilidade', 'transporte': 'Mobilidade',
+    'ambiente': 'Ambiental', 'parques': 'Ambiental', 'jardins': 'Ambiental',
+}
+_CTYPE_RE = re.compile('|'.join(map(re.escape, _CTYPE_MAP)))
+
+# A ordem de inserção de _CTYPE_MAP é a prioridade da cadeia if/elif
+# original (noticia > evento > documento > ...): entre vários tokens na
+# mesma URL ganha o de menor índice, não o mais à esquerda na string
+_CTYPE_PRIORITY = {token: rank for rank, token in enumerate(_CTYPE_MAP)}
+
+# Descrições padrão das categorias principais — constante de módulo para
+# não realocar o dict a cada chamada de get_category_description
+_CATEGORY_DESCRIPTIONS = {
+    "Cidade": "Informações gerais sobre a cidade do Porto, sua história, símbolos e marcos importantes.",
+    "História da cidade": "História e evolução da cidade do Porto ao longo dos séculos, eventos históricos e patrimônio.",
+    "Educação": "Informações sobre o sistema educativo, escolas, programas e iniciativas educacionais no Porto.",
+    "Juventude": "Programas, eventos e iniciativas voltados para jovens na cidade do Porto.",
+    "Cultura": "Eventos culturais, museus, galerias, teatros e patrimônio cultural do Porto.",
+    "Mobilidade": "Transportes públicos, ciclovias, acessibilidade e infraestrutura de mobilidade na cidade.",
+    "Ambiente": "Projetos ambientais, sustentabilidade, parques e jardins da cidade do Porto.",
+    "Município": "Informações sobre a Câmara Municipal do Porto, sua estrutura e funcionamento.",
+    "Urbanismo": "Planos de urbanização, desenvolvimento urbano e gestão territorial da cidade.",
+    "Ação Social": "Programas de apoio social, inclusão e serviços à comunidade no Porto."
+}
+
+# Indicadores de que uma âncora aponta para um PDF (texto ou classe do link)
+_PDF_INDICATORS = frozenset((
+    'pdf', 'documento', 'download', 'baixar', 'regulamento', 'formulário', 'manual'
+))
+
+# Extensões não-HTML a descartar no rastreamento — como tupla, um único
+# str.endswith em C cobre a lista inteira
+_SKIP_SUFFIXES = (
+    '.jpg', '.jpeg', '.png', '.gif', '.svg', '.ico', '.css', '.js',
+    '.mp3', '.mp4', '.avi', '.mov', '.zip', '.rar', '.7z',
+    '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    '.exe', '.apk', '.dmg', '.iso', '.woff', '.woff2',
+)
+
+# Padrões de URL a ignorar, fundidos numa única alternação compilada
+_IGNORE_PATTERN_RE = re.compile('|'.join(map(re.escape, (
+    'login', 'logout', 'admin', 'signup', 'signin',
+    'facebook.com', 'twitter.com', 'instagram.com', 'youtube.com',
+    'mailto:', 'tel:', 'whatsapp', 'javascript:',
+))))
+
+# XPath pré-compilada que empurra o predicado de "âncora candidata a PDF"
+# para dentro do libxml2: href terminado em .pdf, ou indicador no texto/
+# classe combinado com um atributo que menciona pdf/download. Só os nós
+# que passam chegam ao loop Python em _extract_pdf_links_lxml
+if LXML_AVAILABLE:
+    from lxml import etree as _lxml_etree
+
+    _XP_UPPER = "ABCDEFGHIJKLMNOPQRSTUVWXYZÁÂÃÀÇÉÊÍÓÔÕÚÜ"
+    _XP_LOWER = "abcdefghijklmnopqrstuvwxyzáâãàçéêíóôõúü"
+
+    def _xp_lower(expr: str) -> str:
+        """Equivalente XPath 1.0 de str.lower() para os caracteres usados"""
+        return f"translate({expr}, '{_XP_UPPER}', '{_XP_LOWER}')"
+
+    _PDF_XPATH = _lxml_etree.XPath(
+        ".//a[@href and ("
+        f"substring({_xp_lower('@href')}, string-length(@href) - 3) = '.pdf'"
+        " or ((" + " or ".join(
+            f"contains({_xp_lower('.')}, '{ind}') or contains({_xp_lower('@class')}, '{ind}')"
+            for ind in sorted(_PDF_INDICATORS)) + ")"
+        f" and (contains({_xp_lower('@type')}, 'pdf')"
+        f" or contains({_xp_lower('@data-type')}, 'pdf')"
+        f" or contains({_xp_lower('@title')}, 'pdf')"
+        f" or contains({_xp_lower('@download')}, 'download')))"
+        ")]")
+else:
+    _PDF_XPATH = None
+
+# Número de downloads de PDF em paralelo (deve caber na pool da sessão HTTP)
+PDF_WORKERS = 8
+
+# Número de corrotinas no rastreamento completo assíncrono
+CRAWL_WORKERS = 16
+
 # Configuração para o download de PDFs
 PDF_DOWNLOAD_DIR = 'downloads/pdfs'
 os.makedirs(PDF_DOWNLOAD_DIR, exist_ok=True)
@@ -35,47 +189,247 @@ pdf_handler = logging.FileHandler('pdf_downloads.log')
 pdf_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
 pdf_logger.addHandler(pdf_handler)
 
+@functools.lru_cache(maxsize=1024)
+def _url_hash(url: str) -> str:
+    """Hash curto e estável de uma URL para gerar nomes de arquivo únicos.
+
+    BLAKE2b é mais rápido que MD5 no CPython e não é sinalizado por
+    scanners de segurança. Só 8 caracteres hex entram no nome do arquivo,
+    por isso o digest é de 4 bytes — sem gerar bytes que seriam cortados.
+    O lru_cache evita rehash quando a mesma URL aparece em várias páginas"""
+    return hashlib.blake2b(url.encode('utf-8'), digest_size=4).hexdigest()
+
+@functools.lru_cache(maxsize=4096)
+def _main_domain(url: str) -> str:
+    """Domínio principal (sem subdomínios) de uma URL.
+
+    Memoizado porque os mesmos hrefs repetem-se em todas as páginas e
+    urlparse é Python puro no caminho quente do filtro de links"""
+    netloc = urlparse(url).netloc
+    parts = netloc.split('.')
+    return '.'.join(parts[-2:]) if len(parts) >= 2 else netloc
+
+@functools.lru_cache(maxsize=4096)
+def _canon(url: str) -> str:
+    """Forma canónica de uma URL para o conjunto de visitadas.
+
+    Esquema e host minúsculos, sem fragmento, sem barra final e com a
+    query ordenada — /cidade, /cidade/ e /cidade#topo contam como a mesma
+    página, evitando recarregá-la no Selenium"""
+    parts = urlparse(str(url))
+    path = parts.path.rstrip('/') or '/'
+    query = urlencode(sorted(parse_qsl(parts.query)))
+    return urlunparse((parts.scheme.lower(), parts.netloc.lower(), path, parts.params, query, ''))
+
+def make_soup(html: Union[str, bytes]) -> BeautifulSoup:
+    """Cria um BeautifulSoup usando o parser C do lxml (5-10x mais rápido),
+    com fallback para html.parser quando o lxml não está instalado"""
+    try:
+        soup = BeautifulSoup(html, 'lxml')
+    except FeatureNotFound:
+        soup = BeautifulSoup(html, 'html.parser')
+    # Guarda também a árvore lxml nativa: as funções de seleção mais quentes
+    # usam-na para evitar o custo dos objetos Python do BeautifulSoup
+    if LXML_AVAILABLE:
+        try:
+            soup._lxml_root = lxml_html.fromstring(html)
+        except Exception:
+            soup._lxml_root = None
+    return soup
+
 class CmpScraper:
-    def __init__(self, headless=True, max_depth=10, use_templates=True):
+    def __init__(self, headless=True, max_depth=10, use_templates=True, max_workers=4):
         self.base_url = "https://www.cm-porto.pt"
+        self._base_main_domain = _main_domain(self.base_url)
         self.knowledge_base = KnowledgeBase(
             last_updated=datetime.now(),
             version="1.0.0"
         )
         self.max_depth = max_depth
         self.headless = headless
-        self.visited_urls = set()
-        self.url_queue = Queue()
+        # deque: enfileirar/desenfileirar O(1) nas duas pontas, sem o lock
+        # do queue.Queue — o rastreamento completo é single-thread
+        self.url_queue = deque()
         self.url_depth = {}
         self.content_urls = set()
         self.downloaded_pdfs = []
+
+        # URLs visitadas NESTA execução. A base de conhecimento é sempre
+        # reconstruída do zero, portanto o conjunto que condiciona a
+        # extração tem de começar vazio — honrar o visited_urls.json de uma
+        # execução anterior faria o re-run saltar todas as páginas já vistas
+        # e gravar um knowledge_base.json sem conteúdos. O ficheiro continua
+        # a ser escrito em _save_crawl_state como registro da última execução
+        self.visited_urls: Set[str] = set()
+
+        # Estado persistente entre execuções: o índice de PDFs (url ->
+        # registro) dá verificação O(1) em download_pdf e, com os
+        # validadores de GET condicional, evita repetir os downloads —
+        # é ele que torna um re-run barato, não o conjunto de visitadas
+        self._pdf_index: Dict[str, Dict] = self._load_state('pdf_index.json', {})
+
+        # URLs já revalidadas nesta execução com GET condicional — um 304
+        # por URL por crawl chega; as repetições voltam ao cache puro
+        self._revalidated: Set[str] = set()
+
+        # Fila + thread daemon que anexa cada registro de PDF a um log
+        # JSONL append-only: a serialização e o flush saem do caminho
+        # quente dos downloads e o inventário sobrevive a interrupções
+        self._pdf_log_queue: Queue = Queue()
+        threading.Thread(target=self._pdf_log_writer,
+                         name='pdf-log-writer', daemon=True).start()
+
+        # Cache de diretórios já criados e de arquivos existentes por
+        # diretório (nome -> tamanho): evita stat/mkdir por PDF — a pasta
+        # é listada uma vez com os.scandir na primeira utilização
+        self._created_dirs: Set[str] = set()
+        self._existing_files: Dict[str, Dict[str, int]] = {}
         self.use_templates = use_templates
         self.page_templates = {}
+
+        # Concorrência entre categorias independentes: um driver por worker
+        # (emprestado via Queue), estado partilhado protegido por um lock e
+        # o driver corrente de cada thread guardado em threading.local
+        self.max_workers = max(1, max_workers)
+        self._state_lock = threading.Lock()
+        self._local = threading.local()
+
+        # Chrome dedicado aos downloads de PDF, criado só quando o
+        # primeiro fallback acontece (ver _get_pdf_driver). O lock
+        # serializa os fallbacks: o driver é um só (e single-tab) e o
+        # redirecionamento do diretório via CDP não pode mudar debaixo
+        # de um download em curso
+        self._pdf_driver = None
+        self._pdf_driver_lock = threading.Lock()
+
+        # Sessão HTTP partilhada: reaproveita a ligação TCP/TLS entre
+        # downloads para o mesmo host em vez de um handshake por PDF
+        self.http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504]
+            )
+        )
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+        self.http.headers.update({'User-Agent': USER_AGENT})
+
         self.setup_driver()
         
         # Categorias principais para o chatbot
         self.main_sections = [
-            "Cidade", "Município", "Urbanismo", "Ambiente", "Educação", 
+            "Cidade", "Município", "Urbanismo", "Ambiente", "Educação",
             "Cultura", "Economia", "Mobilidade", "Juventude", "Ação Social"
         ]
-        
-        # Extensões de arquivos a ignorar
-        self.ignore_extensions = [
-            '.jpg', '.jpeg', '.png', '.gif', '.ico', '.css', '.js', 
-            '.mp3', '.mp4', '.avi', '.mov', '.zip', '.rar', '.7z', 
-            '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
-            '.exe', '.apk', '.dmg', '.iso'
-        ]
-        
-        # URLs a ignorar (padrões)
-        self.ignore_patterns = [
-            'login', 'logout', 'admin', 'signup', 'signin',
-            'facebook.com', 'twitter.com', 'instagram.com', 'youtube.com',
-            'mailto:', 'tel:', 'whatsapp', 'javascript:'
-        ]
+
+        # Variantes minúsculas das seções (hífens, underscores, sem acentos)
+        # pré-compiladas numa única regex: determine_category faz uma
+        # varredura em C em vez de dezenas de testes `in` por URL
+        variant_to_section = {}
+        for section in self.main_sections:
+            section_lower = section.lower()
+            for variant in (
+                section_lower,
+                section_lower.replace(" ", "-"),
+                section_lower.replace(" ", "_"),
+                section_lower.replace("ç", "c"),
+                section_lower.replace("ã", "a"),
+                section_lower.replace("á", "a"),
+            ):
+                variant_to_section.setdefault(variant, section)
+        self._section_variants = variant_to_section
+        self._section_re = re.compile('|'.join(
+            map(re.escape, sorted(variant_to_section, key=len, reverse=True))))
+
+
+    def _load_state(self, path: str, default):
+        """Carrega um ficheiro de estado JSON deixado por uma execução anterior"""
+        try:
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data.decode('utf-8'))
+        except Exception as e:
+            logger.warning(f"Não foi possível carregar {path}: {str(e)}")
+        return default
+
+    def _atomic_write_json(self, path: str, obj):
+        """Escreve um JSON de estado de forma atómica (tmp + rename)"""
+        try:
+            if ORJSON_AVAILABLE:
+                data = orjson.dumps(obj, default=str)
+            else:
+                data = json.dumps(obj, ensure_ascii=False, default=str).encode('utf-8')
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Não foi possível salvar {path}: {str(e)}")
+
+    def _save_crawl_state(self):
+        """Persiste visited_urls e o índice de PDFs para a próxima execução"""
+        # Espera a thread de escrita drenar o log antes de salvar o índice
+        self._pdf_log_queue.join()
+        self._atomic_write_json('visited_urls.json', sorted(self.visited_urls))
+        self._atomic_write_json('pdf_index.json', self._pdf_index)
+
+    def _register_pdf(self, record: Dict):
+        """Regista um PDF na lista da execução, no índice e no log JSONL"""
+        with self._state_lock:
+            self.downloaded_pdfs.append(record)
+            self._pdf_index[record['url']] = record
+            local_path = record.get('local_path')
+            if local_path:
+                self._existing_files.setdefault(
+                    os.path.dirname(local_path), {})[os.path.basename(local_path)] = record['size']
+        # A persistência fica fora do caminho quente: a thread daemon anexa
+        # o registro ao JSONL e o índice completo só é reescrito nos saves
+        # periódicos e no encerramento (_save_crawl_state)
+        self._pdf_log_queue.put(record)
+
+    def _pdf_log_writer(self):
+        """Loop da thread de escrita: consome registros da fila e anexa cada
+        um como uma linha JSON a pdf_downloads.jsonl.
+
+        A thread nunca pode morrer com a fila viva: task_done é chamado
+        para todo registro mesmo quando o arquivo não abre (cwd somente
+        leitura, disco cheio), senão o join() em _save_crawl_state
+        bloquearia o encerramento para sempre"""
+        f = None
+        try:
+            f = open('pdf_downloads.jsonl', 'ab')
+        except Exception as e:
+            pdf_logger.warning(f"Não foi possível abrir pdf_downloads.jsonl "
+                               f"({str(e)}); registros não serão persistidos")
+        while True:
+            record = self._pdf_log_queue.get()
+            try:
+                if f is not None:
+                    if ORJSON_AVAILABLE:
+                        f.write(orjson.dumps(record, default=str) + b'\n')
+                    else:
+                        f.write(json.dumps(record, ensure_ascii=False,
+                                           default=str).encode('utf-8') + b'\n')
+                    f.flush()
+            except Exception as e:
+                pdf_logger.warning(f"Erro ao escrever no log de PDFs: {str(e)}")
+            finally:
+                self._pdf_log_queue.task_done()
 
     def setup_driver(self):
-        """Configura o driver do Selenium com as opções apropriadas"""
+        """Configura o driver principal do Selenium"""
+        self.driver = self._make_driver()
+
+    def _make_driver(self):
+        """Cria um driver do Chrome com as opções apropriadas.
+
+        Fábrica usada tanto para o driver principal como para os drivers
+        extra do pool quando as categorias são processadas em paralelo"""
         try:
             chrome_options = Options()
             if self.headless:
@@ -85,10 +439,23 @@ class CmpScraper:
             chrome_options.add_argument("--no-sandbox")
             chrome_options.add_argument("--disable-dev-shm-usage")
             chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
+            chrome_options.add_argument(f"user-agent={USER_AGENT}")
             chrome_options.add_argument("--disable-blink-features=AutomationControlled")
             chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
             chrome_options.add_experimental_option("useAutomationExtension", False)
+
+            # O scraper só lê o HTML: desliga imagens, fontes, mídia e
+            # notificações para cortar banda e tempo de carregamento
+            chrome_options.add_experimental_option("prefs", {
+                "profile.managed_default_content_settings.images": 2,
+                "profile.default_content_setting_values.notifications": 2,
+                "profile.managed_default_content_settings.fonts": 2,
+                "profile.managed_default_content_settings.plugins": 2,
+            })
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            chrome_options.add_argument("--disable-gpu")
+            chrome_options.add_argument("--disable-extensions")
+            chrome_options.add_argument("--disable-features=Translate,MediaRouter")
             
             # Verifica se o driver existe
             driver_path = os.path.join(os.path.dirname(__file__), 'drivers', 'chromedriver.exe')
@@ -96,10 +463,11 @@ class CmpScraper:
                 raise FileNotFoundError(f"ChromeDriver não encontrado em: {driver_path}")
 
             service = Service(executable_path=driver_path)
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.driver.set_page_load_timeout(30)
-            
+            driver = webdriver.Chrome(service=service, options=chrome_options)
+            driver.set_page_load_timeout(30)
+
             logger.info("Driver do Selenium configurado com sucesso")
+            return driver
         except Exception as e:
             logger.error(f"Erro ao configurar o driver: {str(e)}")
             raise
@@ -127,62 +495,283 @@ class CmpScraper:
         except Exception as e:
             logger.error(f"Erro durante scraping: {str(e)}", exc_info=True)
         finally:
+            self.close()
+
+    def close(self):
+        """Persiste o estado do crawl e encerra sessão HTTP e drivers.
+
+        Idempotente: é chamado tanto no finally de scrape() como no do
+        __main__, que cobre os caminhos --complete e --analyze-only que
+        não passam por scrape()"""
+        if getattr(self, '_closed', False):
+            return
+        self._closed = True
+        self._save_crawl_state()
+        try:
+            self.http.close()
+        except Exception:
+            pass
+        self._quit_pdf_driver()
+        try:
             self.driver.quit()
-            logger.info("Driver do Selenium encerrado")
-    
+        except Exception:
+            pass
+        logger.info("Driver do Selenium encerrado")
+
+
     def scrape_with_templates(self):
         """Scraping inteligente usando templates identificados"""
         logger.info("Iniciando scraping usando templates de páginas...")
         
         # Inicia com as categorias principais
         main_categories = self.create_manual_categories()
-        
-        # Para cada categoria, extrai subcategorias e conteúdos
-        for category in main_categories:
-            logger.info(f"Processando categoria: {category.name}")
-            
-            # Extrai conteúdos da categoria principal usando templates
-            category_url = str(category.url)
-            if category_url not in self.visited_urls:
-                self.visited_urls.add(category_url)
+
+        # As categorias principais são subárvores independentes do site:
+        # processa-as em paralelo, cada worker com o seu próprio driver
+        workers = min(self.max_workers, len(main_categories))
+        if workers <= 1:
+            for category in main_categories:
+                self._scrape_category(category)
+            return
+
+        driver_pool = Queue()
+        driver_pool.put(self.driver)
+        extra_drivers = []
+        try:
+            for _ in range(workers - 1):
+                driver = self._make_driver()
+                extra_drivers.append(driver)
+                driver_pool.put(driver)
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(
+                    functools.partial(self._scrape_category_pooled, driver_pool),
+                    main_categories))
+        finally:
+            for driver in extra_drivers:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+
+    def _scrape_category_pooled(self, driver_pool: Queue, category: Category):
+        """Empresta um driver do pool, processa a categoria e devolve-o"""
+        driver = driver_pool.get()
+        self._local.driver = driver
+        try:
+            self._scrape_category(category)
+        finally:
+            self._local.driver = None
+            driver_pool.put(driver)
+
+    def _scrape_category(self, category: Category):
+        """Extrai conteúdos e subcategorias de uma categoria principal"""
+        logger.info(f"Processando categoria: {category.name}")
+
+        # Extrai conteúdos da categoria principal usando templates
+        category_url = str(category.url)
+        if self._mark_visited(category_url):
+            try:
+                # Usa extração baseada em templates
+                category_contents = self.extract_content_from_page(category_url, category.name)
+                category.contents = category_contents
+            except Exception as e:
+                logger.error(f"Erro ao extrair conteúdo da categoria {category.name}: {str(e)}")
+
+        # Extrai subcategorias
+        subcategories = self.extract_subcategories(category)
+        processed_subcategories = []
+
+        # Processa subcategorias
+        for subcategory in subcategories[:20]:  # Limita a 20 subcategorias
+            logger.info(f"Processando subcategoria: {subcategory.name}")
+
+            subcategory_url = str(subcategory.url)
+            if self._mark_visited(subcategory_url):
                 try:
                     # Usa extração baseada em templates
-                    category_contents = self.extract_content_from_page(category_url, category.name)
-                    category.contents = category_contents
+                    subcategory_contents = self.extract_content_from_page(subcategory_url, subcategory.name)
+                    subcategory.contents = subcategory_contents
+                    processed_subcategories.append(subcategory)
                 except Exception as e:
-                    logger.error(f"Erro ao extrair conteúdo da categoria {category.name}: {str(e)}")
-            
-            # Extrai subcategorias
-            subcategories = self.extract_subcategories(category)
-            processed_subcategories = []
-            
-            # Processa subcategorias
-            for subcategory in subcategories[:20]:  # Limita a 20 subcategorias
-                logger.info(f"Processando subcategoria: {subcategory.name}")
-                
-                subcategory_url = str(subcategory.url)
-                if subcategory_url not in self.visited_urls:
-                    self.visited_urls.add(subcategory_url)
-                    try:
-                        # Usa extração baseada em templates
-                        subcategory_contents = self.extract_content_from_page(subcategory_url, subcategory.name)
-                        subcategory.contents = subcategory_contents
-                        processed_subcategories.append(subcategory)
-                    except Exception as e:
-                        logger.error(f"Erro ao extrair conteúdo da subcategoria {subcategory.name}: {str(e)}")
-            
-            # Adiciona as subcategorias processadas
-            category.subcategories = processed_subcategories
-            
-            # Adiciona a categoria à base de conhecimento
+                    logger.error(f"Erro ao extrair conteúdo da subcategoria {subcategory.name}: {str(e)}")
+
+        # Adiciona as subcategorias processadas
+        category.subcategories = processed_subcategories
+
+        # Adiciona a categoria à base de conhecimento
+        with self._state_lock:
             self.knowledge_base.add_category(category)
 
+    def _abs(self, url: str) -> str:
+        """URL absoluta em relação à base — só faz o join quando o link é
+        relativo, evitando urljoin redundante em URLs já absolutas"""
+        url = str(url)
+        if url.startswith(('http://', 'https://')):
+            return url
+        return urljoin(self.base_url, url)
+
+    def _mark_visited(self, url: str) -> bool:
+        """Marca a URL como visitada; False se já tinha sido visitada.
+
+        Teste e inserção sob o mesmo lock para os workers paralelos"""
+        key = _canon(url)
+        with self._state_lock:
+            if key in self.visited_urls:
+                return False
+            self.visited_urls.add(key)
+            return True
+
     def scrape_complete_site(self):
-        """Faz scraping completo do site usando rastreamento recursivo"""
+        """Faz scraping completo do site usando rastreamento recursivo.
+
+        Com aiohttp instalado, o rastreamento corre num pool de corrotinas
+        que sobrepõe a latência de rede de várias páginas; senão (ou se o
+        modo assíncrono falhar), usa o loop sequencial sobre a deque"""
+        if AIOHTTP_AVAILABLE:
+            try:
+                asyncio.run(self._scrape_complete_site_async())
+                return
+            except Exception as e:
+                logger.error(f"Rastreamento assíncrono falhou ({str(e)}); usando o modo sequencial")
+
+        self._scrape_complete_site_serial()
+
+    async def _scrape_complete_site_async(self):
+        """BFS assíncrona: CRAWL_WORKERS corrotinas puxam URLs de uma
+        asyncio.Queue e devolvem os links descobertos à mesma fila"""
+        logger.info("Iniciando scraping completo do site (asyncio + aiohttp)...")
+
+        main_categories = self.create_manual_categories()
+        category_dict = {str(cat.url): cat for cat in main_categories}
+
+        work = asyncio.Queue()
+        work.put_nowait(self.base_url)
+        self.url_depth[self.base_url] = 0
+        for category in main_categories:
+            category_url = str(category.url)
+            if category_url not in self.url_depth:
+                work.put_nowait(category_url)
+                self.url_depth[category_url] = 1
+
+        semaphore = asyncio.Semaphore(CRAWL_WORKERS)
+        # O fallback usa o driver principal único — serializa o acesso
+        selenium_lock = asyncio.Lock()
+        stats = {'pages': 0, 'start': time.time()}
+
+        connector = aiohttp.TCPConnector(limit=64, limit_per_host=8, ttl_dns_cache=300)
+        async with aiohttp.ClientSession(
+                connector=connector, headers={'User-Agent': USER_AGENT}) as session:
+            workers = [
+                asyncio.create_task(self._crawl_worker(
+                    work, session, semaphore, selenium_lock,
+                    main_categories, category_dict, stats))
+                for _ in range(CRAWL_WORKERS)
+            ]
+            await work.join()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        # Depois de processar todas as URLs, adiciona categorias à base
+        for category in main_categories:
+            self.knowledge_base.add_category(category)
+
+    async def _crawl_worker(self, work, session, semaphore, selenium_lock,
+                            main_categories, category_dict, stats):
+        """Processa URLs da fila até a task ser cancelada em work.join()"""
+        while True:
+            current_url = await work.get()
+            try:
+                current_depth = self.url_depth.get(current_url, 0)
+                if not self._mark_visited(current_url):
+                    continue
+
+                async with semaphore:
+                    soup = await self._fetch_page_async(session, selenium_lock, current_url)
+                if not soup:
+                    continue
+
+                stats['pages'] += 1
+                if stats['pages'] % 10 == 0:
+                    elapsed = time.time() - stats['start']
+                    pages_per_second = stats['pages'] / elapsed if elapsed > 0 else 0
+                    logger.info(f"Progresso: {stats['pages']} páginas processadas, {work.qsize()} na fila, velocidade: {pages_per_second:.2f} pág/s")
+
+                # Determina a categoria da URL atual
+                category_name = self.determine_category(current_url, category_dict)
+
+                # A extração é CPU-bound: sai do event loop para uma thread
+                try:
+                    page_contents = await asyncio.to_thread(
+                        self._extract_contents_from_soup, soup, current_url, category_name)
+                    self._attach_page_contents(page_contents, current_url, main_categories)
+                except Exception as e:
+                    logger.error(f"Erro ao extrair conteúdo de {current_url}: {str(e)}")
+
+                # Devolve os links novos à fila partilhada
+                if current_depth < self.max_depth:
+                    for new_url in self._collect_links(soup, current_url, current_depth):
+                        work.put_nowait(new_url)
+
+                # Salva a base de conhecimento periodicamente
+                if stats['pages'] % 100 == 0:
+                    self.save_knowledge_base()
+                    self.save_pdf_info()
+            except Exception as e:
+                logger.error(f"Erro ao processar {current_url}: {str(e)}")
+            finally:
+                work.task_done()
+
+    async def _fetch_page_async(self, session, selenium_lock, url: str) -> Optional[BeautifulSoup]:
+        """Busca uma página via aiohttp com fallback serializado para o
+        Selenium quando o HTML devolvido exige JavaScript"""
+        try:
+            timeout = aiohttp.ClientTimeout(total=20)
+            async with session.get(url, timeout=timeout) as response:
+                if response.status == 200:
+                    content_type = response.headers.get('Content-Type', '').lower()
+                    if not content_type or 'html' in content_type:
+                        body = await response.read()
+                        soup = make_soup(body)
+                        # Mesma sentinela do _fetch_http
+                        if soup.body is not None and soup.select_one(
+                                'main, article, .content, .page-content, .container, #main-content'):
+                            return soup
+        except Exception as e:
+            logger.debug(f"Fetch assíncrono falhou para {url}: {str(e)}")
+
+        async with selenium_lock:
+            return await asyncio.to_thread(self._fetch_selenium, url)
+
+    def _attach_page_contents(self, page_contents: List[Content], current_url: str,
+                              main_categories: List[Category]):
+        """Liga os conteúdos extraídos à categoria principal adequada"""
+        if not page_contents or current_url in self.content_urls:
+            return
+
+        # Encontra ou cria a categoria apropriada
+        target_cat = None
+        for cat in main_categories:
+            if self.is_subcategory_of(current_url, str(cat.url)):
+                target_cat = cat
+                break
+
+        if not target_cat:
+            # Se não encontrou uma categoria, usa a primeira
+            target_cat = main_categories[0]
+
+        # Adiciona conteúdo à categoria
+        for content in page_contents:
+            self.add_content_to_category(target_cat, content)
+            self.content_urls.add(current_url)
+
+    def _scrape_complete_site_serial(self):
+        """Rastreamento completo sequencial sobre a deque de URLs"""
         logger.info("Iniciando scraping completo do site...")
         
         # Inicia com a página principal
-        self.url_queue.put(self.base_url)
+        self.url_queue.append(self.base_url)
         self.url_depth[self.base_url] = 0
         
         # Mapeia categorias principais para criar estrutura
@@ -193,7 +782,7 @@ class CmpScraper:
         for category in main_categories:
             category_url = str(category.url)
             if category_url not in self.url_depth:
-                self.url_queue.put(category_url)
+                self.url_queue.append(category_url)
                 self.url_depth[category_url] = 1
         
         # Contador para acompanhamento
@@ -201,23 +790,24 @@ class CmpScraper:
         start_time = time.time()
         
         # Processa cada URL na fila enquanto tiver URLs para processar
-        while not self.url_queue.empty():
-            current_url = self.url_queue.get()
+        while self.url_queue:
+            current_url = self.url_queue.popleft()
             current_depth = self.url_depth[current_url]
             
-            # Se já visitou esta URL, pula
-            if current_url in self.visited_urls:
+            # Se já visitou esta URL (em forma canónica), pula
+            current_key = _canon(current_url)
+            if current_key in self.visited_urls:
                 continue
-            
+
             # Adiciona à lista de URLs visitadas
-            self.visited_urls.add(current_url)
+            self.visited_urls.add(current_key)
             pages_processed += 1
             
             # Log a cada 10 páginas e estatísticas
             if pages_processed % 10 == 0:
                 elapsed = time.time() - start_time
                 pages_per_second = pages_processed / elapsed if elapsed > 0 else 0
-                logger.info(f"Progresso: {pages_processed} páginas processadas, {self.url_queue.qsize()} na fila, velocidade: {pages_per_second:.2f} pág/s")
+                logger.info(f"Progresso: {pages_processed} páginas processadas, {len(self.url_queue)} na fila, velocidade: {pages_per_second:.2f} pág/s")
             
             # Obtém o conteúdo da página
             soup = self.get_page_content(current_url)
@@ -227,28 +817,10 @@ class CmpScraper:
             # Determina a categoria da URL atual
             category_name = self.determine_category(current_url, category_dict)
             
-            # Extrai conteúdo da página atual
+            # Extrai conteúdo da página atual (o soup já foi obtido acima)
             try:
-                page_contents = self.extract_content_from_page(current_url, category_name)
-                
-                # Adiciona o conteúdo extraído à estrutura da base de conhecimento
-                if page_contents and current_url not in self.content_urls:
-                    # Encontra ou cria a categoria apropriada
-                    target_cat = None
-                    for cat in main_categories:
-                        if self.is_subcategory_of(current_url, str(cat.url)):
-                            target_cat = cat
-                            break
-                    
-                    if not target_cat:
-                        # Se não encontrou uma categoria, usa a primeira
-                        target_cat = main_categories[0]
-                    
-                    # Adiciona conteúdo à categoria
-                    for content in page_contents:
-                        self.add_content_to_category(target_cat, content)
-                        self.content_urls.add(current_url)
-                
+                page_contents = self._extract_contents_from_soup(soup, current_url, category_name)
+                self._attach_page_contents(page_contents, current_url, main_categories)
             except Exception as e:
                 logger.error(f"Erro ao extrair conteúdo de {current_url}: {str(e)}")
             
@@ -424,59 +996,65 @@ class CmpScraper:
 
     def extract_and_queue_links(self, soup: BeautifulSoup, base_url: str, current_depth: int):
         """Extrai links da página e os adiciona à fila de processamento"""
+        self.url_queue.extend(self._collect_links(soup, base_url, current_depth))
+
+    def _collect_links(self, soup: BeautifulSoup, base_url: str,
+                       current_depth: int) -> List[str]:
+        """Extrai da página os links novos a rastrear, registrando a
+        profundidade de cada um. Partilhado entre o rastreamento
+        sequencial (deque) e o assíncrono (asyncio.Queue)"""
+        new_urls = []
         if not soup:
-            return
-        
-        # Encontra todos os links na página
-        links = soup.find_all('a', href=True)
-        
-        for link in links:
-            href = link.get('href', '').strip()
-            
+            return new_urls
+
+        # Só os hrefs interessam aqui: a árvore lxml nativa extrai todos
+        # numa única XPath em C, sem criar objetos BeautifulSoup por nó
+        root = getattr(soup, '_lxml_root', None)
+        if root is not None:
+            hrefs = root.xpath('.//a/@href')
+        else:
+            hrefs = (link.get('href', '') for link in soup.find_all('a', href=True))
+
+        for href in hrefs:
+            href = href.strip()
+
             # Pula links vazios ou inválidos
             if not href or href == '#' or href.startswith('javascript:'):
                 continue
-            
+
             # Normaliza URL para url absoluta
             full_url = urljoin(base_url, href)
-            
+
             # Verifica se deve ignorar esta URL
             if self.should_ignore_url(full_url):
                 continue
-            
+
             # Se não visitamos ainda e é do mesmo domínio, adiciona à fila
-            if full_url not in self.visited_urls and self.is_same_domain(full_url):
+            if _canon(full_url) not in self.visited_urls and self.is_same_domain(full_url):
                 # Registra a nova profundidade
                 new_depth = current_depth + 1
-                
+
                 # Se já está na fila com profundidade maior, atualiza para menor
                 if full_url in self.url_depth:
                     if new_depth < self.url_depth[full_url]:
                         self.url_depth[full_url] = new_depth
                 else:
                     # Adiciona à fila e registra profundidade
-                    self.url_queue.put(full_url)
+                    new_urls.append(full_url)
                     self.url_depth[full_url] = new_depth
                     logger.debug(f"Adicionado à fila: {full_url} (profundidade {new_depth})")
 
+        return new_urls
+
     def should_ignore_url(self, url: str) -> bool:
         """Verifica se uma URL deve ser ignorada no rastreamento"""
-        # Verifica extensões a ignorar
-        parsed_url = urlparse(url)
-        path = parsed_url.path.lower()
-        
-        # Ignora URLs com extensões não HTML
-        for ext in self.ignore_extensions:
-            if path.endswith(ext):
-                return True
-        
-        # Ignora padrões específicos
-        url_lower = url.lower()
-        for pattern in self.ignore_patterns:
-            if pattern in url_lower:
-                return True
-        
-        return False
+        # Ignora URLs com extensões não HTML — um único endswith em C
+        # sobre a tupla inteira em vez de um loop Python por extensão
+        if urlparse(url).path.lower().endswith(_SKIP_SUFFIXES):
+            return True
+
+        # Ignora padrões específicos via alternação pré-compilada
+        return _IGNORE_PATTERN_RE.search(url.lower()) is not None
 
     def determine_category(self, url: str, category_dict: Dict[str, Category]) -> str:
         """Determina a qual categoria uma URL pertence"""
@@ -491,25 +1069,12 @@ class CmpScraper:
             if self.is_subcategory_of(url_str, cat_url):
                 return category.name
         
-        # Examina a URL para determinar a categoria
-        url_lower = url_str.lower()
-        
-        for section in self.main_sections:
-            # Verifica ocorrência exata ou com hífens, underscores
-            section_lower = section.lower()
-            section_variants = [
-                section_lower,
-                section_lower.replace(" ", "-"), 
-                section_lower.replace(" ", "_"),
-                section_lower.replace("ç", "c"),
-                section_lower.replace("ã", "a"),
-                section_lower.replace("á", "a")
-            ]
-            
-            for variant in section_variants:
-                if variant in url_lower:
-                    return section
-        
+        # Examina a URL para determinar a categoria (regex pré-compilada
+        # com todas as variantes de seção — ver __init__)
+        match = self._section_re.search(url_str.lower())
+        if match:
+            return self._section_variants[match.group(0)]
+
         # Se não conseguir determinar, retorna "Informações Gerais"
         return "Informações Gerais"
 
@@ -584,30 +1149,25 @@ class CmpScraper:
             
         return categories
 
-    def get_category_description(self, category_name: str) -> str:
-        """Retorna uma descrição padrão baseada no nome da categoria"""
-        descriptions = {
-            "Cidade": "Informações gerais sobre a cidade do Porto, sua história, símbolos e marcos importantes.",
-            "História da cidade": "História e evolução da cidade do Porto ao longo dos séculos, eventos históricos e patrimônio.",
-            "Educação": "Informações sobre o sistema educativo, escolas, programas e iniciativas educacionais no Porto.",
-            "Juventude": "Programas, eventos e iniciativas voltados para jovens na cidade do Porto.",
-            "Cultura": "Eventos culturais, museus, galerias, teatros e patrimônio cultural do Porto.",
-            "Mobilidade": "Transportes públicos, ciclovias, acessibilidade e infraestrutura de mobilidade na cidade.",
-            "Ambiente": "Projetos ambientais, sustentabilidade, parques e jardins da cidade do Porto.",
-            "Município": "Informações sobre a Câmara Municipal do Porto, sua estrutura e funcionamento.",
-            "Urbanismo": "Planos de urbanização, desenvolvimento urbano e gestão territorial da cidade.",
-            "Ação Social": "Programas de apoio social, inclusão e serviços à comunidade no Porto."
-        }
-        return descriptions.get(category_name, f"Informações sobre {category_name} na cidade do Porto.")
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def get_category_description(category_name: str) -> str:
+        """Retorna uma descrição padrão baseada no nome da categoria.
+
+        Puro e memoizado: nomes de categoria repetem-se muito entre páginas"""
+        return _CATEGORY_DESCRIPTIONS.get(category_name, f"Informações sobre {category_name} na cidade do Porto.")
 
     def extract_content_from_page(self, url: str, category_name: str) -> List[Content]:
         """Extrai conteúdos de uma página usando templates ou método genérico"""
         soup = self.get_page_content(url)
         if not soup:
             return []
+        return self._extract_contents_from_soup(soup, url, category_name)
 
-        contents = []
-        
+    def _extract_contents_from_soup(self, soup: BeautifulSoup, url: str,
+                                    category_name: str) -> List[Content]:
+        """Aplica templates ou extração genérica a um soup já obtido —
+        evita voltar a buscar a página quando o chamador já a tem"""
         if self.use_templates and self.page_templates:
             # Usa abordagem de templates adaptável à estrutura da página
             structure = self.identify_page_structure(soup)
@@ -635,6 +1195,48 @@ class CmpScraper:
             # Método genérico de extração
             return self.extract_generic_content(soup, url, category_name)
     
+    def _build_pdf_contents(self, pdf_links: List[Tuple[str, str]], category_name: str,
+                            content_fmt: str = "Documento PDF disponível em {url}",
+                            description_fmt: str = "PDF relacionado a {context}: {title}",
+                            description_context: str = None,
+                            keyword_context: str = None,
+                            title_default: str = "Documento PDF") -> List[Content]:
+        """Baixa os PDFs de uma página em lote e cria os objetos Content.
+
+        Os downloads são puramente I/O-bound, por isso o lote inteiro vai
+        para download_pdfs (aiohttp quando disponível, senão threads) —
+        o tempo da página cai de N·RTT para aproximadamente max(RTT)"""
+        if not pdf_links:
+            return []
+
+        description_context = description_context or category_name
+        keyword_context = keyword_context or category_name
+
+        results = self.download_pdfs(pdf_links, category_name)
+
+        contents = []
+        for (pdf_url, pdf_title), (local_path, file_size) in zip(pdf_links, results):
+            if not local_path:
+                continue
+            try:
+                contents.append(Content(
+                    title=pdf_title or title_default,
+                    content=content_fmt.format(url=pdf_url),
+                    description=description_fmt.format(context=description_context, title=pdf_title),
+                    url=pdf_url,
+                    category=category_name,
+                    content_type="Documento",
+                    type="Documento",
+                    keywords=self.extract_keywords(pdf_title, keyword_context),
+                    last_updated=datetime.now(),
+                    metadata={"local_path": local_path, "file_size": str(file_size)}
+                ))
+                pdf_logger.info(f"PDF adicionado à base de conhecimento: {pdf_title}")
+            except Exception as e:
+                pdf_logger.error(f"Erro ao processar PDF {pdf_url}: {str(e)}")
+
+        return contents
+
     def extract_news_content(self, soup, url, category_name, selectors):
         """Extrai conteúdo específico de páginas de notícias"""
         contents = []
@@ -695,30 +1297,15 @@ class CmpScraper:
                 )
                 contents.append(content)
         
-        # Extrai PDFs relacionados
+        # Extrai PDFs relacionados (downloads em paralelo)
         pdf_links = self.extract_pdf_links(soup, url)
-        for pdf_url, pdf_title in pdf_links:
-            try:
-                local_path, file_size = self.download_pdf(pdf_url, category_name)
-                if local_path:
-                    pdf_content = Content(
-                        title=pdf_title or "Documento PDF",
-                        content=f"Documento PDF relacionado à notícia: {pdf_url}",
-                        description=f"PDF relacionado a {category_name}: {pdf_title}",
-                        url=pdf_url,
-                        category=category_name,
-                        content_type="Documento",
-                        type="Documento",
-                        keywords=self.extract_keywords(pdf_title, category_name),
-                        last_updated=datetime.now(),
-                        metadata={"local_path": local_path, "file_size": str(file_size)}
-                    )
-                    contents.append(pdf_content)
-            except Exception as e:
-                pdf_logger.error(f"Erro ao processar PDF {pdf_url}: {str(e)}")
-        
+        contents.extend(self._build_pdf_contents(
+            pdf_links, category_name,
+            content_fmt="Documento PDF relacionado à notícia: {url}"
+        ))
+
         return contents
-    
+
     def extract_event_content(self, soup, url, category_name, selectors):
         """Extrai conteúdo específico de páginas de eventos"""
         contents = []
@@ -776,28 +1363,13 @@ class CmpScraper:
             )
             contents.append(content)
         
-        # Extrai PDFs relacionados
+        # Extrai PDFs relacionados (downloads em paralelo)
         pdf_links = self.extract_pdf_links(soup, url)
-        for pdf_url, pdf_title in pdf_links:
-            try:
-                local_path, file_size = self.download_pdf(pdf_url, category_name)
-                if local_path:
-                    pdf_content = Content(
-                        title=pdf_title or "Documento PDF",
-                        content=f"Documento PDF relacionado ao evento: {pdf_url}",
-                        description=f"PDF relacionado a {category_name}: {pdf_title}",
-                        url=pdf_url,
-                        category=category_name,
-                        content_type="Documento",
-                        type="Documento",
-                        keywords=self.extract_keywords(pdf_title, category_name),
-                        last_updated=datetime.now(),
-                        metadata={"local_path": local_path, "file_size": str(file_size)}
-                    )
-                    contents.append(pdf_content)
-            except Exception as e:
-                pdf_logger.error(f"Erro ao processar PDF {pdf_url}: {str(e)}")
-        
+        contents.extend(self._build_pdf_contents(
+            pdf_links, category_name,
+            content_fmt="Documento PDF relacionado ao evento: {url}"
+        ))
+
         return contents
     
     def extract_document_content(self, soup, url, category_name, selectors):
@@ -834,26 +1406,11 @@ class CmpScraper:
                 )
                 contents.append(content)
             
-            # Adiciona cada PDF
-            for pdf_url, pdf_title in pdf_links:
-                try:
-                    local_path, file_size = self.download_pdf(pdf_url, category_name)
-                    if local_path:
-                        pdf_content = Content(
-                            title=pdf_title or "Documento PDF",
-                            content=f"Documento PDF disponível em {pdf_url}",
-                            description=f"PDF relacionado a {category_name}: {pdf_title}",
-                            url=pdf_url,
-                            category=category_name,
-                            content_type="Documento",
-                            type="Documento",
-                            keywords=self.extract_keywords(pdf_title, title),
-                            last_updated=datetime.now(),
-                            metadata={"local_path": local_path, "file_size": str(file_size)}
-                        )
-                        contents.append(pdf_content)
-                except Exception as e:
-                    pdf_logger.error(f"Erro ao processar PDF {pdf_url}: {str(e)}")
+            # Adiciona cada PDF (downloads em paralelo)
+            contents.extend(self._build_pdf_contents(
+                pdf_links, category_name,
+                keyword_context=title
+            ))
         else:
             # Se não encontrou PDFs, extrai o conteúdo como página normal
             return self.extract_generic_content(soup, url, category_name)
@@ -943,28 +1500,15 @@ class CmpScraper:
         if not contents:
             return self.extract_generic_content(soup, url, category_name)
         
-        # Extrai PDFs relacionados
+        # Extrai PDFs relacionados (downloads em paralelo)
         pdf_links = self.extract_pdf_links(soup, url)
-        for pdf_url, pdf_title in pdf_links:
-            try:
-                local_path, file_size = self.download_pdf(pdf_url, category_name)
-                if local_path:
-                    pdf_content = Content(
-                        title=pdf_title or "Documento PDF",
-                        content=f"Documento PDF complementar à tabela: {pdf_url}",
-                        description=f"PDF relacionado a {title}: {pdf_title}",
-                        url=pdf_url,
-                        category=category_name,
-                        content_type="Documento",
-                        type="Documento",
-                        keywords=self.extract_keywords(pdf_title, title),
-                        last_updated=datetime.now(),
-                        metadata={"local_path": local_path, "file_size": str(file_size)}
-                    )
-                    contents.append(pdf_content)
-            except Exception as e:
-                pdf_logger.error(f"Erro ao processar PDF {pdf_url}: {str(e)}")
-        
+        contents.extend(self._build_pdf_contents(
+            pdf_links, category_name,
+            content_fmt="Documento PDF complementar à tabela: {url}",
+            description_context=title,
+            keyword_context=title
+        ))
+
         return contents
     
     def extract_form_content(self, soup, url, category_name, selectors):
@@ -1062,25 +1606,13 @@ class CmpScraper:
         
         # Extrai PDFs relacionados (geralmente formulários para download)
         pdf_links = self.extract_pdf_links(soup, url)
-        for pdf_url, pdf_title in pdf_links:
-            try:
-                local_path, file_size = self.download_pdf(pdf_url, category_name)
-                if local_path:
-                    pdf_content = Content(
-                        title=pdf_title or "Formulário PDF",
-                        content=f"Formulário em PDF disponível em {pdf_url}",
-                        description=f"Formulário {pdf_title} para download",
-                        url=pdf_url,
-                        category=category_name,
-                        content_type="Documento",
-                        type="Documento",
-                        keywords=self.extract_keywords(pdf_title, "formulário"),
-                        last_updated=datetime.now(),
-                        metadata={"local_path": local_path, "file_size": str(file_size)}
-                    )
-                    contents.append(pdf_content)
-            except Exception as e:
-                pdf_logger.error(f"Erro ao processar PDF {pdf_url}: {str(e)}")
+        contents.extend(self._build_pdf_contents(
+            pdf_links, category_name,
+            content_fmt="Formulário em PDF disponível em {url}",
+            description_fmt="Formulário {title} para download",
+            keyword_context="formulário",
+            title_default="Formulário PDF"
+        ))
         
         # Se não conseguiu extrair informações específicas, usa método genérico
         if not contents:
@@ -1109,28 +1641,22 @@ class CmpScraper:
             # Amplia os seletores para capturar todos os tipos de títulos
             title_selectors = ['h1', 'h2', '.block_121', '.page-title', '.title', '.main-title', 
                               '.article-title', '.post-title', '.content-title', '.header-title']
-            title_elem = None
-            
+            title_text = ""
+
             for selector in title_selectors:
                 title_elem = soup.select_one(selector)
-                if title_elem and title_elem.get_text(strip=True):
+                if title_elem and (title_text := title_elem.get_text(strip=True)):
                     break
-            
-            # Captura todos os elementos de texto possíveis
-            text_selectors = ['p', '.block_122', '.text', '.description', 'li', '.content-block', 
-                             'div.info', '.details', '.summary', '.paragraph', '.body-text',
-                             'div.texto', '.content-text', '.article-body', 'div[data-content]',
-                             'div.conteudo', 'span.text', '.news-content', '.info-text']
-            
-            # Coletando todos os blocos de texto da página
-            all_text_blocks = []
-            for selector in text_selectors:
-                text_blocks = main_content.select(selector)
-                all_text_blocks.extend(text_blocks)
-            
-            # Monta o texto completo - sem limite de caracteres
-            title_text = title_elem.get_text(strip=True) if title_elem else category_name
-            full_text = " ".join([block.get_text(strip=True) for block in all_text_blocks if block.get_text(strip=True)])
+
+            # Captura todos os elementos de texto possíveis com o seletor
+            # pré-compilado (uma única travessia, em ordem de documento)
+            all_text_blocks = _TEXT_BLOCK_SEL.select(main_content)
+
+            # Monta o texto completo - sem limite de caracteres. O walrus
+            # evita chamar get_text duas vezes por bloco
+            title_text = title_text or category_name
+            full_text = " ".join(
+                text for block in all_text_blocks if (text := block.get_text(strip=True)))
             
             # Se não encontrou texto nos seletores específicos, tenta extrair todo o texto do bloco principal
             if not full_text or len(full_text) < 100:
@@ -1198,21 +1724,19 @@ class CmpScraper:
         
         # 3. Ainda extrai blocos de conteúdo adicionais como no método original
         # Amplia mais ainda os seletores para encontrar qualquer bloco relevante
-        content_blocks = soup.select('.content, .block, .item, .card, .news-item, article, .group-item, .info, .event, '
-                                  '.list-item, .news, .article, .post, .service-item, .feature, .department, '
-                                  '.project, .program, .initiative')
-        
+        content_blocks = _CONTENT_BLOCK_SEL.select(soup)
+
         for block in content_blocks:
             try:
-                title_elem = block.select_one('.name, .title, h3, h4, h5, strong, .event-title, .item-title, .card-title')
+                title_matches = _BLOCK_TITLE_SEL.select(block, limit=1)
+                title_elem = title_matches[0] if title_matches else None
                 link_elem = block.select_one('a')
-                desc_elems = block.select('.description, .excerpt, p, .summary, .details, .event-date, '
-                                       '.event-hour, .event-local, .text, .info-text, .card-text')
+                desc_elems = _BLOCK_DESC_SEL.select(block)
                 
                 title = ""
                 if title_elem:
                     title = title_elem.get_text(strip=True)
-                elif link_elem and link_elem.get_text(strip=True):
+                elif link_elem:
                     title = link_elem.get_text(strip=True)
                 
                 link_url = ""
@@ -1222,7 +1746,9 @@ class CmpScraper:
                     link_url = url
                 
                 # Combina o texto de todos os elementos de descrição
-                description = " ".join([elem.get_text(strip=True) for elem in desc_elems if elem.get_text(strip=True)])
+                # (get_text chamado uma única vez por elemento)
+                description = " ".join(
+                    text for elem in desc_elems if (text := elem.get_text(strip=True)))
                 if not description:
                     # Se não encontrou descrição nos elementos específicos, tenta pegar todo texto do bloco
                     # Primeiro remove elementos que não são relevantes
@@ -1259,35 +1785,10 @@ class CmpScraper:
             except Exception as e:
                 logger.error(f"Erro ao extrair conteúdo de bloco: {str(e)}")
 
-        # 4. Adicionar busca específica por links de PDF
+        # 4. Adicionar busca específica por links de PDF (downloads em paralelo)
         pdf_links = self.extract_pdf_links(soup, url)
-        
-        # Para cada PDF encontrado
-        for pdf_url, pdf_title in pdf_links:
-            try:
-                # Baixa o PDF e obtém o caminho local
-                local_path, file_size = self.download_pdf(pdf_url, category_name)
-                
-                if local_path:
-                    # Cria um objeto de conteúdo para o PDF
-                    # Convertendo file_size para string para resolver o erro
-                    pdf_content = Content(
-                        title=pdf_title or "Documento PDF",
-                        content=f"Documento PDF disponível em {pdf_url}",
-                        description=f"PDF relacionado a {category_name}: {pdf_title}",
-                        url=pdf_url,
-                        category=category_name,
-                        content_type="Documento",
-                        type="Documento",
-                        keywords=self.extract_keywords(pdf_title, category_name),
-                        last_updated=datetime.now(),
-                        metadata={"local_path": local_path, "file_size": str(file_size)}  # Convertido para string
-                    )
-                    contents.append(pdf_content)
-                    pdf_logger.info(f"PDF adicionado à base de conhecimento: {pdf_title}")
-            except Exception as e:
-                pdf_logger.error(f"Erro ao processar PDF {pdf_url}: {str(e)}")
-        
+        contents.extend(self._build_pdf_contents(pdf_links, category_name))
+
         return contents[:50]  # Limita a 50 conteúdos por página
 
     def extract_content_from_subcategory(self, subcategory: Category) -> List[Content]:
@@ -1315,11 +1816,11 @@ class CmpScraper:
         subcategories = []
         
         # Tenta encontrar o painel de submenu para esta categoria
-        panels = soup.select('.panel-menu, .sub-panel-menu, .submenu, nav, .nav, .sidebar')
-        
+        panels = _SUBCAT_PANEL_SEL.select(soup)
+
         # Se não encontrou painéis específicos, busca em qualquer lista que possa conter subcategorias
         if not panels:
-            panels = soup.select('ul, .list, .list-group, .accordion, .dropdown-menu')
+            panels = _SUBCAT_FALLBACK_SEL.select(soup)
         
         for panel in panels:
             # Busca todos os links que podem representar subcategorias
@@ -1330,14 +1831,12 @@ class CmpScraper:
                     name = link.get_text(strip=True)
                     url = link.get('href')
                     
-                    # Filtros para identificar links relevantes como subcategorias
-                    if (name and url and len(name) > 2 and 
-                        not url.startswith('#') and 
-                        not url.startswith('javascript') and
-                        not url.startswith('tel:') and
-                        not url.startswith('mailto:')):
-                        
-                        url = urljoin(self.base_url, url)
+                    # Filtros para identificar links relevantes como
+                    # subcategorias (startswith com tupla: uma chamada C)
+                    if (name and url and len(name) > 2 and
+                            not url.startswith(('#', 'javascript', 'tel:', 'mailto:'))):
+
+                        url = self._abs(url)
                         
                         # Verifica se não é um link externo
                         url_str = str(url)
@@ -1367,8 +1866,9 @@ class CmpScraper:
             # Converte objeto KnowledgeBase para dicionário
             try:
                 if hasattr(self.knowledge_base, "model_dump"):
-                    # Para Pydantic v2+
-                    kb_dict = self.knowledge_base.model_dump()
+                    # Para Pydantic v2+: mode='json' já converte datetimes e
+                    # URLs para primitivos, sem precisar de passada extra
+                    kb_dict = self.knowledge_base.model_dump(mode='json')
                 else:
                     # Para Pydantic v1
                     kb_dict = self.knowledge_base.dict()
@@ -1383,9 +1883,14 @@ class CmpScraper:
                     "version": self.knowledge_base.version
                 }
             
-            # Cria o arquivo com formatação bonita
-            with open('knowledge_base.json', 'w', encoding='utf-8') as f:
-                json.dump(kb_dict, f, ensure_ascii=False, indent=2, default=str)
+            # Cria o arquivo com formatação bonita. O orjson serializa em C
+            # direto para bytes UTF-8 (3-10x mais rápido que o json padrão)
+            if ORJSON_AVAILABLE:
+                with open('knowledge_base.json', 'wb') as f:
+                    f.write(orjson.dumps(kb_dict, option=orjson.OPT_INDENT_2, default=str))
+            else:
+                with open('knowledge_base.json', 'w', encoding='utf-8') as f:
+                    json.dump(kb_dict, f, ensure_ascii=False, indent=2, default=str)
             
             logger.info(f"Base de conhecimento salva com sucesso: {len(self.knowledge_base.categories)} categorias")
             return True
@@ -1404,25 +1909,71 @@ class CmpScraper:
             pdf_logger.error(f"Erro ao salvar informações dos PDFs: {str(e)}")
 
     def get_page_content(self, url: str) -> BeautifulSoup:
+        """Obtém o conteúdo de uma página: primeiro via HTTP simples (sem
+        navegador, <100ms), com fallback para Selenium quando a página
+        exige JavaScript para renderizar"""
+        soup = self._fetch_http(url)
+        if soup is not None:
+            return soup
+        return self._fetch_selenium(url)
+
+    def _fetch_http(self, url: str) -> Optional[BeautifulSoup]:
+        """Busca uma página com a sessão HTTP partilhada.
+
+        Retorna None quando a resposta não parece conter os contentores
+        esperados — nesse caso o chamador cai para o Selenium"""
+        try:
+            # Context manager devolve a ligação à pool assim que possível
+            with self.http.get(url, timeout=15) as response:
+                if response.status_code != 200:
+                    return None
+                content_type = response.headers.get('Content-Type', '').lower()
+                if content_type and 'html' not in content_type:
+                    return None
+                body = response.content
+
+            # Parse a partir dos bytes: deixa o parser detetar o encoding
+            soup = make_soup(body)
+
+            # Sentinela mínima: corpo presente e algum contentor esperado
+            if soup.body is None:
+                return None
+            if not soup.select_one('main, article, .content, .page-content, .container, #main-content'):
+                return None
+
+            logger.info(f"Página obtida via HTTP: {url}")
+            return soup
+        except requests.RequestException as e:
+            logger.debug(f"Fetch HTTP falhou para {url}: {str(e)}")
+            return None
+
+    def _fetch_selenium(self, url: str) -> BeautifulSoup:
         """Obtém o conteúdo de uma página usando Selenium com retentativas"""
         try:
             logger.info(f"Obtendo conteúdo da página: {url}")
-            
+
+            # Usa o driver emprestado a esta thread (workers paralelos)
+            # ou o driver principal quando o scraping é sequencial
+            driver = getattr(self._local, 'driver', None) or self.driver
+
             # Tenta carregar a página até 3 vezes
             for attempt in range(3):
                 try:
-                    self.driver.get(url)
+                    driver.get(url)
                     # Espera o conteúdo carregar
-                    WebDriverWait(self.driver, 10).until(
+                    WebDriverWait(driver, 10).until(
                         EC.presence_of_element_located((By.TAG_NAME, "body"))
                     )
-                    
-                    # Espera adicional para AJAX e JavaScript
-                    time.sleep(2)
-                    
+
+                    # Espera o documento ficar pronto em vez de dormir um
+                    # tempo fixo — páginas já carregadas seguem de imediato
+                    WebDriverWait(driver, 10).until(
+                        lambda d: d.execute_script("return document.readyState") == "complete"
+                    )
+
                     # Obtém o HTML
-                    page_source = self.driver.page_source
-                    soup = BeautifulSoup(page_source, 'html.parser')
+                    page_source = driver.page_source
+                    soup = make_soup(page_source)
                     return soup
                 except (TimeoutException, NoSuchElementException) as e:
                     logger.warning(f"Tentativa {attempt+1} falhou para {url}: {str(e)}")
@@ -1436,52 +1987,81 @@ class CmpScraper:
 
     def extract_pdf_links(self, soup: BeautifulSoup, base_url: str) -> List[Tuple[str, str]]:
         """Extrai links para arquivos PDF da página"""
+        # Caminho rápido: percorre as âncoras na árvore lxml nativa,
+        # sem construir objetos BeautifulSoup por nó
+        root = getattr(soup, '_lxml_root', None)
+        if root is not None:
+            return self._extract_pdf_links_lxml(root, base_url)
+
         pdf_links = []
-        
-        # Busca por links que terminam com .pdf
+        seen_urls = set()
+
+        # Passagem única sobre as âncoras: o teste barato de .pdf primeiro,
+        # só depois os indicadores de texto/classe; dedupe inline
         for link in soup.find_all('a', href=True):
             href = link.get('href', '')
+            pdf_url = href if href.startswith(('http://', 'https://')) else urljoin(base_url, href)
+            if pdf_url in seen_urls:
+                continue
+
+            pdf_title = link.get_text(strip=True)
+
             if href.lower().endswith('.pdf'):
-                pdf_url = urljoin(base_url, href)
-                # Tenta obter um título para o PDF a partir do texto do link
-                pdf_title = link.get_text(strip=True)
                 if not pdf_title:
                     # Se não tiver texto, tenta extrair o nome do arquivo da URL
                     parsed_url = urlparse(pdf_url)
                     filename = os.path.basename(unquote(parsed_url.path))
                     pdf_title = os.path.splitext(filename)[0].replace('_', ' ').replace('-', ' ')
-                
+                seen_urls.add(pdf_url)
                 pdf_links.append((pdf_url, pdf_title))
                 pdf_logger.debug(f"Link PDF encontrado: {pdf_url} - {pdf_title}")
-        
-        # Busca por links que podem ser PDFs pela descrição ou classe
-        pdf_indicators = ['pdf', 'documento', 'download', 'baixar', 'regulamento', 'formulário', 'manual']
-        for link in soup.find_all('a'):
-            if link.get('href') and not link['href'].lower().endswith('.pdf'):
-                link_text = link.get_text(strip=True).lower()
-                link_class = ' '.join(link.get('class', [])).lower()
-                
-                if any(ind in link_text for ind in pdf_indicators) or any(ind in link_class for ind in pdf_indicators):
-                    pdf_url = urljoin(base_url, link['href'])
-                    pdf_title = link.get_text(strip=True)
-                    
-                    # Verifica se parece ser um link para PDF com base em outros atributos
-                    if ('pdf' in link.get('type', '').lower() or 
+                continue
+
+            # Links que podem ser PDFs pela descrição ou classe
+            link_text = pdf_title.lower()
+            link_class = ' '.join(link.get('class', [])).lower()
+            if any(ind in link_text or ind in link_class for ind in _PDF_INDICATORS):
+                # Verifica se parece ser um link para PDF com base em outros atributos
+                if ('pdf' in link.get('type', '').lower() or
                         'pdf' in link.get('data-type', '').lower() or
                         'pdf' in link.get('title', '').lower() or
                         'download' in link.get('download', '').lower()):
-                        pdf_links.append((pdf_url, pdf_title))
-                        pdf_logger.debug(f"Link PDF inferido: {pdf_url} - {pdf_title}")
-        
-        # Remove duplicados
-        unique_links = []
+                    seen_urls.add(pdf_url)
+                    pdf_links.append((pdf_url, pdf_title))
+                    pdf_logger.debug(f"Link PDF inferido: {pdf_url} - {pdf_title}")
+
+        return pdf_links
+
+    def _extract_pdf_links_lxml(self, root, base_url: str) -> List[Tuple[str, str]]:
+        """Versão lxml de extract_pdf_links: a XPath pré-compilada avalia o
+        predicado inteiro dentro do libxml2, e o loop Python só monta as
+        tuplas (url, título) dos candidatos, com deduplicação inline"""
+        pdf_links = []
         seen_urls = set()
-        for url, title in pdf_links:
-            if url not in seen_urls:
-                seen_urls.add(url)
-                unique_links.append((url, title))
-        
-        return unique_links
+
+        for link in _PDF_XPATH(root):
+            href = link.get('href', '')
+            pdf_url = href if href.startswith(('http://', 'https://')) else urljoin(base_url, href)
+            if pdf_url in seen_urls:
+                continue
+            seen_urls.add(pdf_url)
+
+            pdf_title = link.text_content().strip()
+
+            if href.lower().endswith('.pdf'):
+                if not pdf_title:
+                    # Se não tiver texto, tenta extrair o nome do arquivo da URL
+                    parsed_url = urlparse(pdf_url)
+                    filename = os.path.basename(unquote(parsed_url.path))
+                    pdf_title = os.path.splitext(filename)[0].replace('_', ' ').replace('-', ' ')
+                pdf_links.append((pdf_url, pdf_title))
+                pdf_logger.debug(f"Link PDF encontrado: {pdf_url} - {pdf_title}")
+            else:
+                # O predicado da XPath já validou indicadores e atributos
+                pdf_links.append((pdf_url, pdf_title))
+                pdf_logger.debug(f"Link PDF inferido: {pdf_url} - {pdf_title}")
+
+        return pdf_links
 
     def download_pdf(self, pdf_url: str, category: str) -> Tuple[str, int]:
         """
@@ -1489,66 +2069,69 @@ class CmpScraper:
         Retorna (caminho_local, tamanho_bytes)
         """
         try:
-            # Assegura que já não foi baixado anteriormente
-            if hasattr(self, 'downloaded_pdfs'):
-                for pdf in self.downloaded_pdfs:
-                    if pdf['url'] == pdf_url:
-                        pdf_logger.info(f"PDF já baixado anteriormente: {pdf_url}")
-                        return pdf['local_path'], int(pdf['size'])
-            
-            # Gera um nome de arquivo único baseado na URL
-            url_hash = hashlib.md5(pdf_url.encode()).hexdigest()
-            parsed_url = urlparse(pdf_url)
-            filename = os.path.basename(unquote(parsed_url.path))
-            
-            # Se o nome não termina em .pdf, adiciona a extensão
-            if not filename.lower().endswith('.pdf'):
-                filename = f"{url_hash}.pdf"
-            else:
-                # Senão, adiciona hash antes do nome para evitar colisões
-                name, ext = os.path.splitext(filename)
-                filename = f"{name}_{url_hash[:8]}{ext}"
-            
-            # Cria o caminho completo
-            category_dir = os.path.join(PDF_DOWNLOAD_DIR, category.replace(' ', '_').lower())
-            os.makedirs(category_dir, exist_ok=True)
-            local_path = os.path.join(category_dir, filename)
-            
-            # Verifica se o arquivo já existe
-            if os.path.exists(local_path):
-                file_size = os.path.getsize(local_path)
-                pdf_logger.info(f"PDF já existe localmente: {local_path}")
-                
-                # Registra o PDF
-                if hasattr(self, 'downloaded_pdfs'):
-                    self.downloaded_pdfs.append({
-                        'url': pdf_url,
-                        'local_path': local_path,
-                        'size': file_size,
-                        'title': os.path.splitext(os.path.basename(filename))[0],
-                        'category': category,
-                        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    })
-                
-                return local_path, file_size
-            
-            # Faz o download usando requests
+            # Assegura que já não foi baixado (nesta ou em execução anterior)
+            cached = self._pdf_index.get(pdf_url)
+            conditional = {}
+            if cached and cached.get('local_path') and os.path.exists(cached['local_path']):
+                # Com validadores guardados revalida com GET condicional
+                # (uma vez por execução); sem eles, confia no cache local
+                conditional = self._conditional_headers(cached)
+                if not conditional or pdf_url in self._revalidated:
+                    pdf_logger.info(f"PDF já baixado anteriormente: {pdf_url}")
+                    return cached['local_path'], int(cached['size'])
+                self._revalidated.add(pdf_url)
+
+            # Gera o caminho local único baseado na URL
+            local_path, filename = self._pdf_local_path(pdf_url, category)
+
+            if not conditional:
+                # Verifica se o arquivo já existe (cache, sem stat por PDF)
+                file_size = self._existing_files.get(os.path.dirname(local_path), {}).get(filename)
+                if file_size is not None:
+                    pdf_logger.info(f"PDF já existe localmente: {local_path}")
+
+                    # Registra o PDF
+                    self._register_pdf(self._pdf_record(pdf_url, local_path, file_size, category, filename))
+
+                    return local_path, file_size
+
+                # Sonda com HEAD antes de pagar o GET completo (dispensável
+                # quando o índice já confirmou que a URL servia um PDF)
+                if not self._looks_like_pdf(pdf_url):
+                    pdf_logger.warning(f"URL descartada pelo HEAD (não é PDF): {pdf_url}")
+                    return "", 0
+
+            # Faz o download usando a sessão HTTP partilhada
             pdf_logger.info(f"Baixando PDF: {pdf_url}")
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36'}
-            response = requests.get(pdf_url, stream=True, headers=headers, timeout=30)
-            
-            # Verifica se a resposta parece ser um PDF
-            content_type = response.headers.get('Content-Type', '').lower()
-            if response.status_code != 200 or ('application/pdf' not in content_type and not pdf_url.lower().endswith('.pdf')):
-                pdf_logger.warning(f"URL não retornou um PDF válido: {pdf_url} - Status: {response.status_code} - Content-Type: {content_type}")
-                return "", 0
-            
-            # Salva o arquivo PDF
-            with open(local_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            
+            with self.http.get(pdf_url, stream=True, timeout=30,
+                               headers=conditional or None) as response:
+                if response.status_code == 304:
+                    # Não mudou no servidor: custo de um HEAD, zero corpo
+                    pdf_logger.info(f"PDF inalterado no servidor (304): {pdf_url}")
+                    return cached['local_path'], int(cached['size'])
+
+                # Verifica se a resposta parece ser um PDF
+                content_type = response.headers.get('Content-Type', '').lower()
+                if response.status_code != 200 or ('application/pdf' not in content_type and not pdf_url.lower().endswith('.pdf')):
+                    pdf_logger.warning(f"URL não retornou um PDF válido: {pdf_url} - Status: {response.status_code} - Content-Type: {content_type}")
+                    # Última tentativa: alguns servidores só servem o PDF
+                    # a um navegador completo
+                    if pdf_url.lower().endswith('.pdf'):
+                        return self.download_pdf_with_selenium(pdf_url, category)
+                    return "", 0
+
+                # Copia o corpo direto do socket para o disco em blocos de
+                # 1 MiB — menos travessias Python/C e syscalls maiores; o
+                # PDF nunca é materializado inteiro em memória
+                response.raw.decode_content = True
+                with open(local_path, 'wb', buffering=1 << 20) as f:
+                    shutil.copyfileobj(response.raw, f, length=1 << 20)
+
+                # Guarda os validadores para o GET condicional de recrawls
+                validators = {k: response.headers.get(h) for k, h in
+                              (('etag', 'ETag'), ('last_modified', 'Last-Modified'))
+                              if response.headers.get(h)}
+
             # Verifica o tamanho do arquivo
             file_size = os.path.getsize(local_path)
             
@@ -1562,111 +2145,359 @@ class CmpScraper:
                     return "", 0
             
             pdf_logger.info(f"PDF baixado com sucesso: {local_path} ({file_size} bytes)")
-            
+
             # Registra o PDF baixado
-            if hasattr(self, 'downloaded_pdfs'):
-                self.downloaded_pdfs.append({
-                    'url': pdf_url,
-                    'local_path': local_path,
-                    'size': file_size,
-                    'title': os.path.splitext(os.path.basename(filename))[0],
-                    'category': category,
-                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                })
-            
+            self._register_pdf(self._pdf_record(pdf_url, local_path, file_size, category, filename, validators))
+
             return local_path, file_size
-            
+
         except Exception as e:
             pdf_logger.error(f"Erro ao baixar PDF {pdf_url}: {str(e)}")
             return "", 0
 
+    @staticmethod
+    def _conditional_headers(cached: Dict) -> Dict[str, str]:
+        """Monta os cabeçalhos If-None-Match/If-Modified-Since a partir dos
+        validadores guardados no índice (vazio se o servidor não os enviou)"""
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    def _looks_like_pdf(self, pdf_url: str) -> bool:
+        """Sonda a URL com um HEAD barato antes do GET completo.
+
+        Só retorna False quando o servidor responde e o Content-Type
+        claramente não é PDF; 403/405 (HEAD não permitido) e erros de
+        rede deixam o GET decidir"""
+        try:
+            response = self.http.head(pdf_url, allow_redirects=True, timeout=10)
+        except requests.RequestException:
+            return True
+
+        if response.status_code in (403, 405):
+            return True
+        if response.status_code != 200:
+            return False
+
+        content_type = response.headers.get('Content-Type', '').lower()
+        if content_type and 'application/pdf' not in content_type and not pdf_url.lower().endswith('.pdf'):
+            return False
+        return True
+
+    def _pdf_local_path(self, pdf_url: str, category: str) -> Tuple[str, str]:
+        """Calcula (caminho_local, nome_de_arquivo) únicos para um PDF"""
+        url_hash = _url_hash(pdf_url)
+        parsed_url = urlparse(pdf_url)
+        filename = os.path.basename(unquote(parsed_url.path))
+
+        # Se o nome não termina em .pdf, adiciona a extensão
+        if not filename.lower().endswith('.pdf'):
+            filename = f"{url_hash}.pdf"
+        else:
+            # Senão, adiciona hash antes do nome para evitar colisões
+            name, ext = os.path.splitext(filename)
+            filename = f"{name}_{url_hash}{ext}"
+
+        category_dir = os.path.join(PDF_DOWNLOAD_DIR, category.replace(' ', '_').lower())
+        if category_dir not in self._created_dirs:
+            os.makedirs(category_dir, exist_ok=True)
+            # Lista a pasta uma única vez para o cache de existência
+            self._existing_files[category_dir] = {
+                entry.name: entry.stat().st_size
+                for entry in os.scandir(category_dir) if entry.is_file()
+            }
+            self._created_dirs.add(category_dir)
+        return os.path.join(category_dir, filename), filename
+
+    def _pdf_record(self, pdf_url: str, local_path: str, file_size: int,
+                    category: str, filename: str,
+                    validators: Optional[Dict[str, str]] = None) -> Dict:
+        """Monta o registro de um PDF baixado para o índice persistente"""
+        record = {
+            'url': pdf_url,
+            'local_path': local_path,
+            'size': file_size,
+            'title': os.path.splitext(os.path.basename(filename))[0],
+            'category': category,
+            # time.strftime evita alocar um objeto datetime por PDF
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        if validators:
+            record.update(validators)
+        return record
+
+    def download_pdfs(self, pdf_links: List[Tuple[str, str]], category: str) -> List[Tuple[str, int]]:
+        """Baixa um lote de PDFs e retorna [(caminho_local, tamanho)].
+
+        Prefere o caminho assíncrono (aiohttp + aiofiles) quando as
+        bibliotecas estão instaladas; senão distribui as URLs por um
+        ThreadPoolExecutor sobre a sessão HTTP partilhada"""
+        if not pdf_links:
+            return []
+
+        if AIOHTTP_AVAILABLE and AIOFILES_AVAILABLE and len(pdf_links) > 1:
+            try:
+                return asyncio.run(self._download_pdfs_async(pdf_links, category))
+            except Exception as e:
+                pdf_logger.warning(f"Download assíncrono falhou, caindo para threads: {str(e)}")
+
+        with ThreadPoolExecutor(max_workers=PDF_WORKERS) as executor:
+            return list(executor.map(
+                lambda job: self.download_pdf(job[0], category), pdf_links))
+
+    async def _download_pdfs_async(self, pdf_links: List[Tuple[str, str]],
+                                   category: str) -> List[Tuple[str, int]]:
+        """Baixa o lote inteiro numa única sessão aiohttp.
+
+        Um Semaphore limita a concorrência ao mesmo teto dos workers de
+        thread; o connector reaproveita ligações e cacheia DNS"""
+        semaphore = asyncio.Semaphore(PDF_WORKERS)
+        connector = aiohttp.TCPConnector(limit=64, limit_per_host=8, ttl_dns_cache=300)
+        async with aiohttp.ClientSession(
+                connector=connector, headers={'User-Agent': USER_AGENT}) as session:
+            return list(await asyncio.gather(*(
+                self._download_pdf_async(semaphore, session, pdf_url, category)
+                for pdf_url, _ in pdf_links)))
+
+    async def _download_pdf_async(self, semaphore, session, pdf_url: str,
+                                  category: str) -> Tuple[str, int]:
+        """Versão corrotina de download_pdf: mesmas verificações e registro"""
+        async with semaphore:
+            try:
+                cached = self._pdf_index.get(pdf_url)
+                conditional = {}
+                if cached and cached.get('local_path') and os.path.exists(cached['local_path']):
+                    conditional = self._conditional_headers(cached)
+                    if not conditional or pdf_url in self._revalidated:
+                        pdf_logger.info(f"PDF já baixado anteriormente: {pdf_url}")
+                        return cached['local_path'], int(cached['size'])
+                    self._revalidated.add(pdf_url)
+
+                local_path, filename = self._pdf_local_path(pdf_url, category)
+                timeout = aiohttp.ClientTimeout(total=60)
+
+                if not conditional:
+                    file_size = self._existing_files.get(os.path.dirname(local_path), {}).get(filename)
+                    if file_size is not None:
+                        pdf_logger.info(f"PDF já existe localmente: {local_path}")
+                        self._register_pdf(self._pdf_record(pdf_url, local_path, file_size, category, filename))
+                        return local_path, file_size
+
+                    # Sonda com HEAD antes de pagar o GET completo (403/405
+                    # significam apenas que o servidor não aceita HEAD)
+                    async with session.head(pdf_url, allow_redirects=True, timeout=timeout) as probe:
+                        if probe.status == 200:
+                            probe_type = probe.headers.get('Content-Type', '').lower()
+                            if probe_type and 'application/pdf' not in probe_type and not pdf_url.lower().endswith('.pdf'):
+                                pdf_logger.warning(f"URL descartada pelo HEAD (não é PDF): {pdf_url}")
+                                return "", 0
+                        elif probe.status not in (403, 405):
+                            pdf_logger.warning(f"URL descartada pelo HEAD (status {probe.status}): {pdf_url}")
+                            return "", 0
+
+                pdf_logger.info(f"Baixando PDF: {pdf_url}")
+                async with session.get(pdf_url, timeout=timeout,
+                                       headers=conditional or None) as response:
+                    if response.status == 304:
+                        pdf_logger.info(f"PDF inalterado no servidor (304): {pdf_url}")
+                        return cached['local_path'], int(cached['size'])
+
+                    content_type = response.headers.get('Content-Type', '').lower()
+                    if response.status != 200 or ('application/pdf' not in content_type and not pdf_url.lower().endswith('.pdf')):
+                        pdf_logger.warning(f"URL não retornou um PDF válido: {pdf_url} - Status: {response.status} - Content-Type: {content_type}")
+                        return "", 0
+
+                    validators = {k: response.headers.get(h) for k, h in
+                                  (('etag', 'ETag'), ('last_modified', 'Last-Modified'))
+                                  if response.headers.get(h)}
+
+                    # Escrita em blocos de 64 KB sem bloquear o event loop
+                    async with aiofiles.open(local_path, 'wb') as f:
+                        async for chunk in response.content.iter_chunked(65536):
+                            await f.write(chunk)
+
+                file_size = os.path.getsize(local_path)
+
+                # Verifica a assinatura do arquivo como no caminho síncrono
+                with open(local_path, 'rb') as f:
+                    if f.read(4) != b'%PDF':
+                        pdf_logger.warning(f"Arquivo não parece ser um PDF válido: {local_path}")
+                        os.remove(local_path)
+                        return "", 0
+
+                pdf_logger.info(f"PDF baixado com sucesso: {local_path} ({file_size} bytes)")
+                self._register_pdf(self._pdf_record(pdf_url, local_path, file_size, category, filename, validators))
+                return local_path, file_size
+            except Exception as e:
+                pdf_logger.error(f"Erro ao baixar PDF {pdf_url}: {str(e)}")
+                return "", 0
+
+    def download_pdf_with_selenium(self, pdf_url: str, category: str) -> Tuple[str, int]:
+        """Fallback: baixa um PDF através do Chrome quando o GET direto não
+        serve o arquivo (páginas que exigem cookies ou JavaScript).
+
+        O arquivo baixado é identificado por diff de snapshots do diretório
+        (os.scandir, que cacheia o stat de cada entrada) — sem varrer a
+        pasta inteira com getctime por arquivo.
+
+        Os workers de PDF e de categoria podem chegar aqui em simultâneo:
+        o download inteiro corre sob _pdf_driver_lock, senão duas threads
+        criariam dois Chromes (um ficaria órfão) e o setDownloadBehavior
+        de uma redirecionaria o download em curso da outra, corrompendo o
+        diff de snapshots"""
+        try:
+            local_path, filename = self._pdf_local_path(pdf_url, category)
+            category_dir = os.path.dirname(local_path)
+
+            # Já existe? (cache de existência, sem stat)
+            file_size = self._existing_files.get(category_dir, {}).get(filename)
+            if file_size is not None:
+                pdf_logger.info(f"PDF já existe localmente: {local_path}")
+                return local_path, file_size
+
+            with self._pdf_driver_lock:
+                # Reverifica sob o lock: outra thread pode ter acabado de
+                # baixar exatamente este arquivo enquanto esperávamos
+                file_size = self._existing_files.get(category_dir, {}).get(filename)
+                if file_size is not None:
+                    pdf_logger.info(f"PDF já existe localmente: {local_path}")
+                    return local_path, file_size
+
+                # Snapshot do diretório antes do download
+                with os.scandir(category_dir) as entries:
+                    before = {entry.name for entry in entries}
+
+                driver = self._get_pdf_driver(category_dir)
+                pdf_logger.info(f"Baixando PDF via Selenium: {pdf_url}")
+                driver.get(pdf_url)
+
+                # Sonda o diretório a cada 100 ms até o download concluir
+                # (teto de 30 s) — PDFs pequenos terminam em décimos de
+                # segundo em vez de esperarem um sleep fixo
+                new_files = []
+                for _ in range(300):
+                    time.sleep(0.1)
+                    new_files = self._completed_downloads(category_dir, before)
+                    if new_files:
+                        break
+
+                if not new_files:
+                    pdf_logger.warning(f"Download via Selenium não produziu arquivo: {pdf_url}")
+                    return "", 0
+
+                # Move o arquivo novo para o nome canónico derivado da URL
+                os.replace(os.path.join(category_dir, new_files[0]), local_path)
+                file_size = os.path.getsize(local_path)
+
+            pdf_logger.info(f"PDF baixado via Selenium: {local_path} ({file_size} bytes)")
+            self._register_pdf(self._pdf_record(pdf_url, local_path, file_size, category, filename))
+            return local_path, file_size
+        except Exception as e:
+            pdf_logger.error(f"Erro no download via Selenium de {pdf_url}: {str(e)}")
+            return "", 0
+
+    def _completed_downloads(self, category_dir: str, before: Set[str]) -> List[str]:
+        """Arquivos novos e completos no diretório (ignora parciais do Chrome)"""
+        with os.scandir(category_dir) as entries:
+            return [entry.name for entry in entries
+                    if entry.name not in before
+                    and not entry.name.endswith(('.crdownload', '.tmp'))]
+
+    def _get_pdf_driver(self, download_dir: str):
+        """Driver único para os fallbacks de PDF, criado sob demanda.
+
+        Arrancar o Chrome custa ~1 s; o mesmo processo serve todos os
+        fallbacks e só o diretório de destino muda, redirecionado por
+        chamada via CDP"""
+        if self._pdf_driver is None:
+            self._pdf_driver = self._make_driver()
+            atexit.register(self._quit_pdf_driver)
+        self._pdf_driver.execute_cdp_cmd("Page.setDownloadBehavior", {
+            "behavior": "allow",
+            "downloadPath": os.path.abspath(download_dir),
+        })
+        return self._pdf_driver
+
+    def _quit_pdf_driver(self):
+        """Encerra o driver de PDFs se tiver sido criado"""
+        if self._pdf_driver is not None:
+            try:
+                self._pdf_driver.quit()
+            except Exception:
+                pass
+            self._pdf_driver = None
+
     def is_same_domain(self, url: str) -> bool:
         """Verifica se a URL pertence ao mesmo domínio base"""
         try:
             if not url:
                 return False
-            
-            base_domain = urlparse(self.base_url).netloc
-            url_domain = urlparse(url).netloc
-            
-            # Verifica se o domínio principal (sem subdomínios) é o mesmo
-            base_main_domain = '.'.join(base_domain.split('.')[-2:]) if len(base_domain.split('.')) >= 2 else base_domain
-            url_main_domain = '.'.join(url_domain.split('.')[-2:]) if len(url_domain.split('.')) >= 2 else url_domain
-            
-            return url_main_domain == base_main_domain
+            # Compara domínios principais (sem subdomínios), ambos em cache
+            return _main_domain(str(url)) == self._base_main_domain
         except Exception:
             return False
 
-    def determine_content_type(self, url: str) -> str:
-        """Determina o tipo de conteúdo baseado na URL"""
-        # Assegurar que a URL é uma string
-        url_lower = str(url).lower() if hasattr(url, "__str__") else str(url).lower()
-        
-        if "noticia" in url_lower or "news" in url_lower:
-            return "Notícia"
-        elif "evento" in url_lower or "agenda" in url_lower:
-            return "Evento"
-        elif "documento" in url_lower or ".pdf" in url_lower:
-            return "Documento"
-        elif "projeto" in url_lower:
-            return "Projeto"
-        elif any(word in url_lower for word in ["educacao", "escola", "ensino"]):
-            return "Educacional"
-        elif any(word in url_lower for word in ["cultura", "museu", "teatro"]):
-            return "Cultural"
-        elif any(word in url_lower for word in ["mobilidade", "transporte"]):
-            return "Mobilidade"
-        elif any(word in url_lower for word in ["ambiente", "parques", "jardins"]):
-            return "Ambiental"
-        else:
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def determine_content_type(url: str) -> str:
+        """Determina o tipo de conteúdo baseado na URL.
+
+        Puro e memoizado: é chamado por bloco de conteúdo e as URLs
+        repetem-se. A regex pré-compilada percorre a URL uma única vez e,
+        havendo vários tokens (ex.: /agenda/noticia-1, /cultura/doc.pdf),
+        decide o de maior prioridade, como a cadeia if/elif original"""
+        tokens = _CTYPE_RE.findall(str(url).lower())
+        if not tokens:
             return "Informação"
+        return _CTYPE_MAP[min(tokens, key=_CTYPE_PRIORITY.__getitem__)]
 
     def extract_keywords(self, title: str, description: str) -> List[str]:
         """Extrai palavras-chave relevantes do título e descrição"""
-        common_words = {"do", "da", "de", "no", "na", "os", "as", "um", "uma", "com", "para", "pelo", "pela", "que", "por"}
-        
         # Normaliza e combina texto
-        text = f"{title or ''} {description or ''}"
-        text = text.lower()
-        
-        # Remove caracteres especiais e divide em palavras
-        import re
-        words = re.findall(r'\b[a-zÀ-ÿ]{4,}\b', text)
-        words = [w for w in words if w not in common_words]
-        
+        text = f"{title or ''} {description or ''}".lower()
+
+        # Tokeniza com a regex pré-compilada e filtra stop-words
+        words = [w for w in _TOKEN_RE.findall(text) if w not in _STOP_WORDS]
+
         # Se não houver palavras adequadas, usar algumas padrão
         if not words:
             return ["porto", "município", "informação", "cidade"]
-        
-        # Conta frequência
-        word_freq = {}
-        for word in words:
-            word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Ordena por frequência
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        
-        # Retorna primeiras 8 palavras-chave
-        return [word for word, _ in sorted_words[:8]]
+
+        # Conta e retorna as 8 palavras mais frequentes (Counter conta em C
+        # e most_common usa heapq — sem converter a lista para array)
+        return [word for word, _ in Counter(words).most_common(8)]
 
 if __name__ == "__main__":
+    # uvloop (Linux/macOS) troca o event loop por libuv — o crawl e os
+    # downloads assíncronos ganham sem nenhuma outra alteração
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
     # Configuração via argumentos de linha de comando
     import argparse
-    
+
     parser = argparse.ArgumentParser(description='Scraper inteligente para o site da Câmara Municipal do Porto')
     parser.add_argument('--headless', action='store_true', default=True, help='Executar em modo headless (sem interface gráfica)')
     parser.add_argument('--depth', type=int, default=5, help='Profundidade máxima de rastreamento (default: 5)')
     parser.add_argument('--use-templates', action='store_true', default=True, help='Usar templates para extração de conteúdo')
     parser.add_argument('--complete', action='store_true', help='Fazer rastreamento completo do site')
     parser.add_argument('--analyze-only', action='store_true', help='Apenas analisar a estrutura do site sem coletar conteúdo')
-    
+    parser.add_argument('--workers', type=int, default=4, help='Número de drivers paralelos para categorias independentes (default: 4)')
+
     args = parser.parse_args()
-    
+
     # Inicializa o scraper
     scraper = CmpScraper(
-        headless=args.headless, 
+        headless=args.headless,
         max_depth=args.depth,
-        use_templates=args.use_templates
+        use_templates=args.use_templates,
+        max_workers=args.workers
     )
     
     try:
@@ -1685,6 +2516,7 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"Erro durante a execução: {str(e)}")
     finally:
-        if hasattr(scraper, 'driver'):
-            scraper.driver.quit()
+        # Cobre os modos que não passam por scrape(): salva o estado do
+        # crawl e encerra sessão e drivers (close() é idempotente)
+        scraper.close()
 
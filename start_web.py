@@ -9,32 +9,37 @@ import time
 import requests
 import os
 
-def check_ollama():
-    """Verifica se o Ollama está rodando."""
+def _fetch_tags():
+    """Busca a lista de modelos do Ollama uma única vez (None se offline)."""
     try:
         response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        return response.status_code == 200
+        return response.json() if response.status_code == 200 else None
     except:
-        return False
+        return None
 
-def check_model():
+def check_ollama(tags=None):
+    """Verifica se o Ollama está rodando."""
+    return (tags if tags is not None else _fetch_tags()) is not None
+
+def check_model(tags=None):
     """Verifica se o modelo llama2:latest está disponível."""
-    try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        if response.status_code == 200:
-            models = [m['name'] for m in response.json()['models']]
-            return 'llama2:latest' in models
-        return False
-    except:
+    if tags is None:
+        tags = _fetch_tags()
+    if not tags:
         return False
+    models = [m['name'] for m in tags.get('models', [])]
+    return 'llama2:latest' in models
 
 def main():
     print("🤖 Chatbot do Câmara Municipal do Porto - Interface Web")
     print("=" * 50)
     
+    # Uma única chamada à API serve as duas verificações abaixo
+    tags = _fetch_tags()
+
     # Verificar se o Ollama está rodando
     print("🔍 Verificando Ollama...")
-    if not check_ollama():
+    if not check_ollama(tags):
         print("❌ Ollama não está rodando!")
         print("📝 Para iniciar o Ollama, execute em outro terminal:")
         print("   ollama run llama2:latest")
@@ -49,7 +54,7 @@ def main():
     
     # Verificar se o modelo está disponível
     print("🔍 Verificando modelo...")
-    if not check_model():
+    if not check_model(tags):
         print("❌ Modelo llama2:latest não encontrado!")
         print("📝 Para baixar o modelo, execute:")
         print("   ollama pull llama2:latest")